@@ -2,27 +2,24 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
+import Analytics
+import ChartCache
+import FactTable
+import RevenueCube
 
 def show_page():
-# Load Excel file
-    excel_file = "BaseDatasheet.xlsx"
-    sheet_name = "Sheet1"
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
+# Load revenue cube (aggregated once per data version)
+    cube = RevenueCube.get_cube()
 
     st.title("📅 Monthly Actuals Revenue Comparison")
 
-    # Define calendar month order
-    month_order = [
-        "Jan", "Feb", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
-
-    # Identify Actuals columns
-    actuals_cols = [col for col in df.columns if "Actuals" in col]
+    # Calendar order comes from the canonical month dimension
+    month_order = FactTable.MONTHS
+    actuals_months = RevenueCube.months(cube, "Actuals")
 
     # 🎯 Multi-select for projects
     st.markdown("### 🎯 Filter by Project(s)")
-    projects = df["Project Name"].unique().tolist()
+    projects = RevenueCube.projects(cube)
     projects.insert(0, "All Projects")
     selected_projects = st.multiselect("Choose one or more projects", options=projects, default="All Projects")
 
@@ -30,64 +27,80 @@ def show_page():
     st.markdown("### ✅ Select Months to Compare")
     selected_months = []
     cols = st.columns(4)
-    for i, col in enumerate(actuals_cols):
-        month = col.replace(" Actuals", "")
+    for i, month in enumerate(actuals_months):
         with cols[i % 4]:
-            if st.checkbox(month, key=col):
-                selected_months.append(col)
+            if st.checkbox(month, key=f"{month} Actuals"):
+                selected_months.append(month)
 
     # Filter data based on selected projects
     if "All Projects" in selected_projects or not selected_projects:
-        filtered_df = df.copy()
+        project_filter = None
     else:
-        filtered_df = df[df["Project Name"].isin(selected_projects)]
+        project_filter = selected_projects
 
     # Show charts if months are selected
     if selected_months:
+        months = selected_months
+
+        filters = {"months": months, "projects": project_filter}
+        # Monthly totals with MoM / rolling / YTD / YoY for the selected projects (analytics engine)
+        trend = Analytics.monthly(project_filter, months)
+
         # 🔹 Total actuals chart
-        totals = filtered_df[selected_months].sum().reset_index()
-        totals.columns = ["Month", "Total Actuals"]
-        totals["Month"] = totals["Month"].str.replace(" Actuals", "", regex=False)
-        totals["Month"] = pd.Categorical(totals["Month"], categories=month_order, ordered=True)
-        totals = totals.sort_values("Month")
+        def total_chart():
+            totals = trend[["Month", "Value"]].rename(columns={"Value": "Total Actuals"})
+
+            bar = alt.Chart(totals).mark_bar().encode(
+                x=alt.X("Month", title="Month", sort=month_order),
+                y=alt.Y("Total Actuals", title="Revenue"),
+                color=alt.Color("Month", legend=None),
+                tooltip=["Month", "Total Actuals"]
+            )
+            text = alt.Chart(totals).mark_text(
+                align="center",
+                baseline="middle",
+                dy=10,
+                color="white"
+            ).encode(
+                x=alt.X("Month", sort=month_order),
+                y="Total Actuals",
+                text=alt.Text("Total Actuals", format=".0f")
+            )
+            return bar + text
 
         st.markdown("### 📊 Total Actuals by Month")
-        bar = alt.Chart(totals).mark_bar().encode(
-            x=alt.X("Month", title="Month", sort=month_order),
-            y=alt.Y("Total Actuals", title="Revenue"),
-            color=alt.Color("Month", legend=None),
-            tooltip=["Month", "Total Actuals"]
-        )
-        text = alt.Chart(totals).mark_text(
-            align="center",
-            baseline="middle",
-            dy=10,
-            color="white"
-        ).encode(
-            x=alt.X("Month", sort=month_order),
-            y="Total Actuals",
-            text=alt.Text("Total Actuals", format=".0f")
-        )
-        st.altair_chart(bar + text, use_container_width=True)
+        ChartCache.altair_chart("ActualsByMonth", "totals", filters, total_chart, use_container_width=True)
 
         # 📈 Trend line chart by project
-        st.markdown("### 📈 Actuals Trend Line by Project")
-        line_data = filtered_df[["Project Name"] + selected_months].melt(
-            id_vars="Project Name",
-            var_name="Month",
-            value_name="Actuals"
-        )
-        line_data["Month"] = line_data["Month"].str.replace(" Actuals", "", regex=False)
-        line_data["Month"] = pd.Categorical(line_data["Month"], categories=month_order, ordered=True)
+        def trend_chart():
+            line_data = RevenueCube.totals_by(
+                cube, ["Project Name", "Month"], "Actuals", months=months, projects=project_filter
+            ).rename(columns={"Value": "Actuals"})
 
-        line_chart = alt.Chart(line_data).mark_line(point=True).encode(
-            x=alt.X("Month:N", title="Month", sort=month_order),
-            y=alt.Y("Actuals:Q", title="Actuals"),
-            color=alt.Color("Project Name:N", title="Project"),
-            tooltip=["Project Name", "Month", "Actuals"]
-        ).properties(height=400)
+            return alt.Chart(line_data).mark_line(point=True).encode(
+                x=alt.X("Month:N", title="Month", sort=month_order),
+                y=alt.Y("Actuals:Q", title="Actuals"),
+                color=alt.Color("Project Name:N", title="Project"),
+                tooltip=["Project Name", "Month", "Actuals"]
+            ).properties(height=400)
 
-        st.altair_chart(line_chart, use_container_width=True)
+        st.markdown("### 📈 Actuals Trend Line by Project")
+        ChartCache.altair_chart("ActualsByMonth", "trend", filters, trend_chart, use_container_width=True)
+
+        # 📆 Month-over-month, rolling average and year-to-date for the selection
+        st.markdown("### 📆 Month-over-Month & YTD")
+        money = st.column_config.NumberColumn(format="dollar")
+        change = st.column_config.NumberColumn(format="%+.0f")
+        percent = st.column_config.NumberColumn(format="%+.1f%%")
+        st.dataframe(
+            trend, hide_index=True, use_container_width=True,
+            column_config={
+                "Value": money, "MoM": change, "MoM %": percent, Analytics.ROLLING: money,
+                "YTD": money, "YoY": change, "YoY %": percent,
+            }
+        )
+        st.caption(f"{Analytics.ROLLING}: average of the month and the {Analytics.LOOKBACK} before it. "
+                   f"YoY compares with the {Analytics.LIVE_YEAR - 1} Actuals partition, when one is stored.")
 
     else:
         st.info("☝️ Please select one or more months to display the chart.")
@@ -2,6 +2,13 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
+import Analytics
+import ChartCache
+import DataExport
+import PartitionStore
+import Profiler
+import RevenueCube
+
 def show_page():
     st.markdown(
         """
@@ -30,20 +37,9 @@ def show_page():
     st.title("📅 Actuals By Year")
     st.markdown("---")
 
-    excel_file = "BaseDatasheet.xlsx"
-    sheet3_df = pd.read_excel(excel_file, sheet_name="Sheet3")
-    df_melted = sheet3_df.melt(id_vars=["Total Revenue ($)"], var_name="Year", value_name="Revenue")
-    df_melted = df_melted.rename(columns={"Total Revenue ($)": "Month"})
-    df_melted["Revenue_M"] = df_melted["Revenue"] / 1_000_000
-    df_melted["RevenueLabel"] = df_melted["Revenue_M"].apply(lambda x: f"{x:.1f}M")
-
-    month_to_quarter = {
-        "January": "Q1", "February": "Q1", "March": "Q1",
-        "April": "Q2", "May": "Q2", "June": "Q2",
-        "July": "Q3", "August": "Q3", "September": "Q3",
-        "October": "Q4", "November": "Q4", "December": "Q4"
-    }
-    df_melted["Quarter"] = df_melted["Month"].map(month_to_quarter)
+    # Sheet3 melted to Month/Year rows once per data version; years with project-level
+    # partitions (PartitionStore) are totalled from their facts instead
+    df_melted = RevenueCube.get_year_cube()
 
     # Sidebar filters
     st.sidebar.header("🔍 Filter Options")
@@ -70,9 +66,10 @@ def show_page():
                 if cols[j].checkbox(f"{month}", value=True):
                     selected_months.append(month)
 
-    filtered_df = df_melted[
-        df_melted["Year"].isin(selected_years) & df_melted["Month"].isin(selected_months)
-    ]
+    with Profiler.stage("filter"):
+        filtered_df = df_melted[
+            df_melted["Year"].isin(selected_years) & df_melted["Month"].isin(selected_months)
+        ]
 
     if not filtered_df.empty:
 
@@ -80,24 +77,19 @@ def show_page():
         with st.container():
             st.markdown('<div class="card"><div class="card-header">🧭 ActualsByYear_Mini Dashboard Comparison</div>', unsafe_allow_html=True)
 
-            comparison_df = df_melted[df_melted["Month"].isin(selected_months)]
-            year_summary = comparison_df.groupby("Year")["Revenue"].sum().reset_index()
-            year_summary["Revenue_M"] = year_summary["Revenue"] / 1_000_000
+            # Month x Year totals are precomputed; the selection is a masked sum and the
+            # year-over-year deltas one vectorized difference
+            year_summary = Analytics.year_over_year(selected_months)
 
             comp_cols = st.columns(len(year_summary))
-            previous_rev = None
-            for i, row in year_summary.iterrows():
+            for i, row in enumerate(year_summary.itertuples(index=False)):
                 with comp_cols[i]:
-                    current_rev = row["Revenue_M"]
-                    delta_val = None if previous_rev is None else current_rev - previous_rev
-                    delta_display = "N/A" if delta_val is None else f"{delta_val:+.1f}M"
                     st.metric(
-                        label=f"📅 {row['Year']}",
-                        value=f"{current_rev:.1f}M",
-                        delta=delta_display,
+                        label=f"📅 {row.Year}",
+                        value=f"{row.Revenue_M:.1f}M",
+                        delta="N/A" if pd.isna(row.Delta_M) else f"{row.Delta_M:+.1f}M",
                         delta_color="normal"
                     )
-                    previous_rev = current_rev
 
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -110,8 +102,7 @@ def show_page():
             max_row = filtered_df.loc[filtered_df["Revenue"].idxmax()]
             peak_month = max_row["Month"]
 
-            filtered_df["ShareOfTotal"] = (filtered_df["Revenue"] / total_revenue) * 100
-            filtered_df["MonthRank"] = filtered_df["Revenue"].rank(method="min", ascending=False).astype(int)
+            filtered_df = RevenueCube.with_shares(filtered_df)
 
             col1, col2, col3 = st.columns(3)
             col1.metric("📊 Total Revenue", f"${total_revenue:,.0f}")
@@ -126,47 +117,63 @@ def show_page():
             """)
 
             view_mode = st.radio("📊 Choose View Mode:", ["Monthly View", "Quarterly View"])
-            revenue_target = 5.0
-            target_df = filtered_df.copy()
-            target_df["Target"] = revenue_target
-            chart_x = "Month:N" if view_mode == "Monthly View" else "Quarter:N"
-
-            base = alt.Chart(filtered_df).encode(
-                x=alt.X(chart_x, sort=available_months),
-                xOffset="Year:N",
-                y=alt.Y("Revenue_M:Q", title="Revenue (Millions)", axis=alt.Axis(format="~s")),
-                color=alt.Color("Year:N", legend=alt.Legend(title="Year")),
-                tooltip=[
-                    alt.Tooltip("Year:N"),
-                    alt.Tooltip("Month:N"),
-                    alt.Tooltip("Revenue_M:Q", title="Revenue (M)", format=".2f"),
-                    alt.Tooltip("ShareOfTotal:Q", title="% of Total", format=".1f"),
-                    alt.Tooltip("MonthRank:N", title="Rank")
-                ]
-            )
-
-            bars = base.mark_bar(size=30, cornerRadius=4)
-            labels = base.mark_text(
-                align="center", baseline="bottom", dy=-5,
-                fontSize=12, color="black"
-            ).encode(text="RevenueLabel:N")
-
-            line = base.mark_line(point=True, strokeDash=[3, 3], strokeWidth=2).encode(y="Revenue_M:Q")
-            zero_line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(strokeDash=[2, 2], color='gray').encode(y='y:Q')
-            target_line = alt.Chart(target_df).mark_line(color="orange", strokeDash=[6, 3]).encode(x=chart_x, y="Target:Q")
-            rule = alt.Chart(filtered_df[filtered_df["Month"] == peak_month]).mark_rule(color="gold", strokeDash=[4, 2], strokeWidth=2).encode(x="Month:N")
-
-            chart = (bars + labels + line + zero_line + target_line + rule).properties(
-                title="💰 Total Revenue by Month and Year (Millions)",
-                height=420,
-                width="container"
-            ).configure_title(
-                fontSize=18,
-                fontWeight="bold",
-                color="#1f77b4"
-            ).configure_view(stroke=None)
-
-            st.altair_chart(chart, use_container_width=True)
+            chart_filters = {
+                "years": selected_years, "months": selected_months, "view": view_mode,
+                "partitions": PartitionStore.version(),
+            }
+
+            def revenue_chart():
+                revenue_target = 5.0
+                target_df = filtered_df.copy()
+                target_df["Target"] = revenue_target
+                chart_x = "Month:N" if view_mode == "Monthly View" else "Quarter:N"
+
+                # MoM / YoY / rolling per Year and Month from the analytics engine, for the tooltips
+                year_metrics = Analytics.year_metrics().frame(selected_years, selected_months, key_name="Year")
+                chart_df = filtered_df.merge(
+                    year_metrics[["Year", "Month", "MoM %", "YoY %", Analytics.ROLLING]], on=["Year", "Month"], how="left"
+                )
+                chart_df[Analytics.ROLLING] = chart_df[Analytics.ROLLING] / 1_000_000
+
+                base = alt.Chart(chart_df).encode(
+                    x=alt.X(chart_x, sort=available_months),
+                    xOffset="Year:N",
+                    y=alt.Y("Revenue_M:Q", title="Revenue (Millions)", axis=alt.Axis(format="~s")),
+                    color=alt.Color("Year:N", legend=alt.Legend(title="Year")),
+                    tooltip=[
+                        alt.Tooltip("Year:N"),
+                        alt.Tooltip("Month:N"),
+                        alt.Tooltip("Revenue_M:Q", title="Revenue (M)", format=".2f"),
+                        alt.Tooltip("ShareOfTotal:Q", title="% of Total", format=".1f"),
+                        alt.Tooltip("MonthRank:N", title="Rank"),
+                        alt.Tooltip("MoM %:Q", title="MoM %", format="+.1f"),
+                        alt.Tooltip("YoY %:Q", title="YoY %", format="+.1f"),
+                        alt.Tooltip(f"{Analytics.ROLLING}:Q", title=f"{Analytics.ROLLING} avg (M)", format=".2f"),
+                    ]
+                )
+
+                bars = base.mark_bar(size=30, cornerRadius=4)
+                labels = base.mark_text(
+                    align="center", baseline="bottom", dy=-5,
+                    fontSize=12, color="black"
+                ).encode(text="RevenueLabel:N")
+
+                line = base.mark_line(point=True, strokeDash=[3, 3], strokeWidth=2).encode(y="Revenue_M:Q")
+                zero_line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(strokeDash=[2, 2], color='gray').encode(y='y:Q')
+                target_line = alt.Chart(target_df).mark_line(color="orange", strokeDash=[6, 3]).encode(x=chart_x, y="Target:Q")
+                rule = alt.Chart(filtered_df[filtered_df["Month"] == peak_month]).mark_rule(color="gold", strokeDash=[4, 2], strokeWidth=2).encode(x="Month:N")
+
+                return (bars + labels + line + zero_line + target_line + rule).properties(
+                    title="💰 Total Revenue by Month and Year (Millions)",
+                    height=420,
+                    width="container"
+                ).configure_title(
+                    fontSize=18,
+                    fontWeight="bold",
+                    color="#1f77b4"
+                ).configure_view(stroke=None)
+
+            ChartCache.altair_chart("ActualsByYear", "revenue", chart_filters, revenue_chart, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
         # PIVOT SECTION
@@ -174,13 +181,25 @@ def show_page():
             show_pivot = st.checkbox("🧮 Show Raw Pivot Table")
             if show_pivot:
                 st.markdown('<div class="card"><div class="card-header">🔍 Revenue Pivot View</div>', unsafe_allow_html=True)
-                pivot = filtered_df.pivot_table(index=["Month"], columns="Year", values="Revenue_M")
+                pivot = filtered_df.pivot_table(index=["Month"], columns="Year", values="Revenue_M", observed=True)
                 st.dataframe(pivot.style.format("{:.2f}M"))
                 st.markdown('</div>', unsafe_allow_html=True)
 
-        st.download_button(
-            label="📥 Download Filtered Data",
-            data=filtered_df.to_csv(index=False),
-            file_name="Filtered_Revenue_By_Year.csv",
-            mime="text/csv"
+        # PROJECT DRILL-DOWN (only years stored as project-level partitions)
+        stored = set(PartitionStore.partitions())
+        drill_years = [year for year in selected_years if (year, "Actuals") in stored]
+        if drill_years:
+            with st.container():
+                st.markdown('<div class="card"><div class="card-header">🔎 Project Drill-down</div>', unsafe_allow_html=True)
+                drill_year = st.selectbox("Year", drill_years, index=len(drill_years) - 1)
+                # only this year's partition is read, and its totals are cached
+                project_df = PartitionStore.project_totals(drill_year, selected_months)
+                project_df = project_df.rename(columns={"Value": "Revenue"})
+                st.dataframe(project_df.style.format({"Revenue": "${:,.0f}"}), use_container_width=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+
+        # Built only when requested, not on every rerun
+        DataExport.export_button(
+            "Filtered Data", "Filtered_Revenue_By_Year", lambda: filtered_df,
+            selection=(sorted(map(str, selected_years)), sorted(selected_months))
         )
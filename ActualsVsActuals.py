@@ -2,25 +2,16 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
-# Load Excel file
-excel_file = "BaseDatasheet.xlsx"
-sheet_name = "Sheet1"
-df = pd.read_excel(excel_file, sheet_name=sheet_name)
+import DataStore
 
-st.title("📅 Monthly Actuals Revenue Comparison")
-
-# Define calendar month order (all 12 months)
-month_order = [
-    "Jan", "Feb", "March", "April", "May", "June",
-    "July", "August", "September", "October", "November", "December"
-]
+# Sheet1 month values in long form (built once per data version)
+facts = DataStore.fact_table()
 
-# Identify Actuals columns
-actuals_cols = [col for col in df.columns if "Actuals" in col]
+st.title("📅 Monthly Actuals Revenue Comparison")
 
 # 🎯 Multi-select for projects
 st.markdown("### 🎯 Filter by Project(s)")
-projects = df["Project Name"].unique().tolist()
+projects = facts.frame["Project Name"].dropna().unique().tolist()
 projects.insert(0, "All Projects")  # Add 'All Projects' option
 
 selected_projects = st.multiselect("Choose one or more projects", options=projects, default="All Projects")
@@ -29,27 +20,22 @@ selected_projects = st.multiselect("Choose one or more projects", options=projec
 st.markdown("### ✅ Select Months to Compare")
 selected_months = []
 cols = st.columns(4)
-for i, col in enumerate(actuals_cols):
-    month = col.replace(" Actuals", "")
+for i, month in enumerate(facts.months("Actuals")):
     with cols[i % 4]:
-        if st.checkbox(month, key=col):
-            selected_months.append(col)
+        if st.checkbox(month, key=f"{month} Actuals"):
+            selected_months.append(month)
 
 # Filter by selected projects
 if "All Projects" in selected_projects or not selected_projects:
-    filtered_df = df.copy()
+    project_filter = None
 else:
-    filtered_df = df[df["Project Name"].isin(selected_projects)]
+    project_filter = selected_projects
 
 # If months are selected, calculate totals and show chart
 if selected_months:
-    totals = filtered_df[selected_months].sum().reset_index()
+    # Selected months' Actuals blocks, summed per month (calendar order)
+    totals = facts.totals("Month", months=selected_months, metrics="Actuals", projects=project_filter)
     totals.columns = ["Month", "Total Actuals"]
-    totals["Month"] = totals["Month"].str.replace(" Actuals", "", regex=False)
-
-    # Sort by calendar month order
-    totals["Month"] = pd.Categorical(totals["Month"], categories=month_order, ordered=True)
-    totals = totals.sort_values("Month")
 
     # Bar chart
     bar = alt.Chart(totals).mark_bar().encode(
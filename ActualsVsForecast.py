@@ -2,26 +2,26 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
+import ChartCache
+import DataStore
+import FactTable
+import Profiler
+import RevenueCube
+import Variance
+
 def show_page():
-# Load Excel
-    excel_file = "BaseDatasheet.xlsx"
-    sheet_name = "Sheet1"
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
+# Sheet1 month values in long form (built once per data version)
+    facts = DataStore.fact_table()
 
     st.title("📁 Forecast vs Actuals by Project")
 
-    # Extract valid months
-    month_options = []
-    for col in df.columns:
-        if "Actuals" in col:
-            m = col.split()[0]
-            if f"{m} Forecast" in df.columns:
-                month_options.append(m)
+    # Months that have both an Actuals and a Forecast column
+    forecast_months = set(facts.months("Forecast"))
+    month_options = [m for m in facts.months("Actuals") if m in forecast_months]
 
     # Select project
-    project_names = df["Project Name"].dropna().unique()
+    project_names = RevenueCube.projects(RevenueCube.get_cube())
     selected_project = st.selectbox("Select a project", project_names)
-    project_data = df[df["Project Name"] == selected_project]
 
     # Select months
     st.markdown("### 🗓️ Select Months for Comparison")
@@ -32,36 +32,24 @@ def show_page():
             if st.checkbox(m, key=f"month_{m}"):
                 selected_months.append(m)
 
+    # Selected months' blocks of the fact table, for this project only
+    with Profiler.stage("filter"):
+        project_data = None
+        if selected_months:
+            project_data = facts.totals(["Month", "Metric"], months=selected_months, projects=[selected_project])
+            # a month or metric with no values for the project still gets its (zero) bar
+            grid = pd.MultiIndex.from_product([selected_months, FactTable.METRICS], names=["Month", "Metric"])
+            project_data = project_data.set_index(["Month", "Metric"]).reindex(grid, fill_value=0).reset_index()
+
     # Show chart
     if selected_months and not project_data.empty:
         st.subheader(f"📊 Actuals & Forecast per Month for {selected_project}")
 
-        chart_rows = []
-        label_order = []
-
-        for m in selected_months:
-            actual_col = f"{m} Actuals"
-            forecast_col = f"{m} Forecast"
-            actual = project_data[actual_col].sum() if actual_col in project_data else 0
-            forecast = project_data[forecast_col].sum() if forecast_col in project_data else 0
-
-            chart_rows.append({
-                "Month": m,
-                "Label": f"{m} - Actual",
-                "Metric": "Actual",
-                "Value": actual,
-                "ValueLabel": f"${actual:,.0f}"
-            })
-            chart_rows.append({
-                "Month": m,
-                "Label": f"{m} - Forecast",
-                "Metric": "Forecast",
-                "Value": forecast,
-                "ValueLabel": f"${forecast:,.0f}"
-            })
-            label_order.extend([f"{m} - Actual", f"{m} - Forecast"])
-
-        df_chart = pd.DataFrame(chart_rows)
+        df_chart = project_data.astype({"Month": str, "Metric": str})
+        df_chart["Metric"] = df_chart["Metric"].map({"Actuals": "Actual", "Forecast": "Forecast"})
+        df_chart["Label"] = df_chart["Month"] + " - " + df_chart["Metric"]
+        df_chart["ValueLabel"] = df_chart["Value"].map("${:,.0f}".format)
+        label_order = df_chart["Label"].tolist()
 
         # Bar chart layer
         bars = alt.Chart(df_chart).mark_bar(size=20).encode(
@@ -93,3 +81,53 @@ def show_page():
         st.info("☝️ Please select one or more months.")
     else:
         st.warning("⚠️ No data found for the selected project.")
+
+    # 🏁 Forecast accuracy for every project at once (precomputed per data version;
+    # ranking and filtering below never reload or regroup Sheet1)
+    st.markdown("---")
+    st.subheader("🏁 Forecast Accuracy Across Projects")
+    variance = Variance.get_variance()
+    compare_months = selected_months or variance.months()
+
+    c1, c2, c3, c4 = st.columns(4)
+    rank_by = c1.selectbox("Rank by", Variance.RANK_BY)
+    top_n = c2.number_input("Top N", min_value=1, max_value=max(len(variance), 1), value=min(10, max(len(variance), 1)))
+    service_lines = c3.multiselect("Service Line", sorted(variance.keys["ServiceLine"].dropna().unique()))
+    regions = c4.multiselect("Region", sorted(variance.keys["Region"].dropna().unique()))
+    worst_first = st.checkbox("Worst forecasts first", value=True)
+
+    ranked = variance.top(top_n, rank_by, compare_months, service_lines, regions, worst_first)
+    st.caption(
+        f"Over {'the selected months' if selected_months else 'every month with both Actuals and Forecast'} "
+        f"({len(compare_months)}). Variance = Actuals − Forecast; Bias % = Variance / Forecast "
+        "(positive: under-forecast). MAPE % averages |Actuals − Forecast| / |Actuals| per month."
+    )
+
+    if ranked.empty:
+        st.info("No projects with both Actuals and Forecast match these filters.")
+    else:
+        filters = {
+            "months": compare_months, "by": rank_by, "n": top_n, "service_lines": service_lines,
+            "regions": regions, "worst_first": worst_first,
+        }
+
+        def ranking_chart():
+            return alt.Chart(ranked).mark_bar().encode(
+                y=alt.Y("Project Name:N", sort=None, title="Project"),
+                x=alt.X(f"{rank_by}:Q", title=rank_by),
+                color=alt.condition(alt.datum.Variance < 0, alt.value("#d62728"), alt.value("#2ca02c")),
+                tooltip=["Project Name", "ServiceLine", "Region", alt.Tooltip("Variance:Q", format="$,.0f"),
+                         alt.Tooltip("MAPE %:Q", format=".1f"), alt.Tooltip("Bias %:Q", format="+.1f")]
+            ).properties(height=30 * len(ranked) + 40)
+
+        ChartCache.altair_chart("ActualsVsForecast", "ranking", filters, ranking_chart, use_container_width=True)
+
+        money = st.column_config.NumberColumn(format="dollar")
+        st.dataframe(
+            ranked, hide_index=True, use_container_width=True,
+            column_config={
+                "Actuals": money, "Forecast": money, "Variance": money, "Abs Variance": money,
+                "MAPE %": st.column_config.NumberColumn(format="%.1f%%"),
+                "Bias %": st.column_config.NumberColumn(format="%+.1f%%"),
+            }
+        )
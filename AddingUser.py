@@ -1,10 +1,12 @@
 import streamlit as st
-from openpyxl import load_workbook, Workbook
-import os
+
+import BulkImport
+import StorageBackend
 
 def show_page():
 
     st.title("Revenue Tracker System")
+    st.caption("Adding many associates at once? Use Bulk Import with a CSV or Excel file.")
 
     # Create a form
     with st.form("user_form"):
@@ -12,7 +14,7 @@ def show_page():
         # Dropdown for Service Line selection
         service_line = st.selectbox(    
             "Select Service Line",
-            ["QEA", "SPE", "UI/UX"]
+            BulkImport.SERVICE_LINES
         )
         
         
@@ -21,47 +23,36 @@ def show_page():
         
         project_name = st.selectbox(
             "Select Project",
-            ["QTest", "Ptest", "Rtest", "Srest", "Trest", "Urest", "Vrest", "Wrest", "Xrest", "Yrest", "Zrest"]
+            BulkImport.PROJECTS
         )
 
 
         # Dropdown for Practice Line selection
         practice_line = st.selectbox(
             "Select Practice Line",
-            ["NFT", "SRE", "QTP"]
+            BulkImport.PRACTICE_LINES
         )
 
         # Dropdown for Region selection 
         region_selection = st.selectbox(
             "Select Region",
-            ["NA", "APAC", "EU"]
+            BulkImport.REGIONS
         )
 
-        # Dropdown for Active / Not Active selection 
-        active_selection = st.selectbox(
-            "Is Active",
-            ["Yes", "No"]
-        )
-            
         submitted = st.form_submit_button("Submit")
 
-    # Excel file path
-    excel_file = "BaseDatasheet.xlsx"
-
     # Handle form submission
     if submitted:
         st.success(f"Thanks {associate_name}, your data is now added!")
 
-        if not os.path.exists(excel_file):
-            wb = Workbook()
-            ws = wb.active
-            #ws.append(["Name", "Age Group", "Feedback Type", "Detailed Feedback"])  # Header
-            ws.append(["service_line", "associate_name", "associate_id", "project_name","practice_line", "region_selection", "active_selection"])  # Header
-        else:
-            wb = load_workbook(excel_file)
-            ws = wb.active
-
-        ws.append([service_line, associate_name, associate_id, project_name, practice_line, region_selection, active_selection])  # Append the data
-        wb.save(excel_file)
-
-        st.info("Your response has been saved to Excel.")
+        # xlsx: O(1) journal append, compacted into Sheet1 in batches; mongo: insert_one
+        StorageBackend.get_backend().append_row({
+            "ServiceLine": service_line,
+            "AssociateName": associate_name,
+            "AssociateID": associate_id,
+            "Project Name": project_name,
+            "PracticeLine": practice_line,
+            "Region": region_selection,
+        }, sheet_name="Sheet1")
+
+        st.info("Your response has been recorded.")
@@ -0,0 +1,283 @@
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import DataStore
+import FactTable
+import PartitionStore
+import RevenueCube
+
+# Month-over-month, year-over-year, rolling and year-to-date revenue metrics.
+# Two series, each a (row x 12 calendar months) matrix:
+#   - years: the Month x Year totals of RevenueCube's year cube (Sheet3, or a year's Actuals
+#     partition where one is stored), one row per year;
+#   - projects: the live year's Sheet1 Actuals per project, with the project's row from
+#     last year's Actuals partition (if stored) as the YoY baseline.
+# Each metric is one numpy operation over the whole matrix (shifted difference, sliding
+# mean, cumulative sum) instead of a loop over rows; MoM and the rolling window reach back
+# into the previous year's last months where that year is known. The tables are built
+# from the revenue cube / year totals once per data version, next to them (RefreshWorker),
+# as an update of the last built table: only rows (projects, or years / partitions) whose
+# values, lookback or baseline changed since then are recomputed. Editing one project's
+# actuals recomputes that project's row; storing a year's partition recomputes that year
+# and the next one.
+#
+# LIVE_YEAR (REVENUE_YEAR, default this calendar year) is the year Sheet1 holds.
+# Build timing: python Analytics.py [workbook]
+
+LIVE_YEAR = int(os.environ.get("REVENUE_YEAR", date.today().year))
+ROLLING_MONTHS = 3
+LOOKBACK = ROLLING_MONTHS - 1  # months before January that a row's window metrics need
+MONTHS = FactTable.MONTHS
+ROLLING = f"Rolling {ROLLING_MONTHS}M"
+COLUMNS = ["Value", "MoM", "MoM %", ROLLING, "YTD", "YoY", "YoY %"]
+ALL_PROJECTS = "All Projects"
+
+
+def _pct(delta, base):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base != 0, delta / np.abs(base) * 100, np.nan)
+
+
+def window_metrics(values, lookback, baseline):
+    """{metric: rows x 12} for a rows x 12 matrix of monthly values.
+
+    lookback holds the LOOKBACK months before each row's January and baseline the same
+    months a year earlier (NaN where unknown).
+    """
+    extended = np.hstack([lookback, values])
+    previous = extended[:, LOOKBACK - 1:-1]
+    mom = values - previous
+    rolling = np.stack([extended[:, i:i + len(MONTHS)] for i in range(ROLLING_MONTHS)]).mean(axis=0)
+    ytd = np.cumsum(np.nan_to_num(values), axis=1)
+    ytd[np.isnan(values)] = np.nan
+    yoy = values - baseline
+    return {
+        "Value": values, "MoM": mom, "MoM %": _pct(mom, previous), ROLLING: rolling,
+        "YTD": ytd, "YoY": yoy, "YoY %": _pct(yoy, baseline),
+    }
+
+
+def _same_rows(old, new):
+    return ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+
+
+def _month_positions(months):
+    if months is None:
+        return np.arange(len(MONTHS))
+    return np.array([MONTHS.index(FactTable.canonical_month(month)) for month in months], dtype=np.intp)
+
+
+class MetricTable:
+    """Window metrics per row (a year or a project) over the calendar months; never mutated."""
+
+    def __init__(self, keys, values, lookback, baseline, metrics=None, recomputed=None):
+        self.keys = pd.Index(keys)
+        self.values = values
+        self.lookback = lookback
+        self.baseline = baseline
+        self.metrics = window_metrics(values, lookback, baseline) if metrics is None else metrics
+        # rows whose metrics were computed for this table (the rest came from the last one)
+        self.recomputed = len(self.keys) if metrics is None else recomputed
+        self._total = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, keys, values, lookback, baseline):
+        """A table for these inputs, recomputing only rows whose inputs differ from this table's."""
+        keys = pd.Index(keys)
+        positions = self.keys.get_indexer(keys) if len(self.keys) else np.full(len(keys), -1)
+        known = np.flatnonzero(positions >= 0)
+        old = positions[known]
+        changed = np.ones(len(keys), dtype=bool)
+        changed[known] = ~(
+            _same_rows(self.values[old], values[known])
+            & _same_rows(self.lookback[old], lookback[known])
+            & _same_rows(self.baseline[old], baseline[known])
+        )
+        rows = np.flatnonzero(changed)
+        fresh = window_metrics(values[rows], lookback[rows], baseline[rows])
+        metrics = {}
+        for name, computed in fresh.items():
+            merged = np.empty(values.shape)
+            merged[known] = self.metrics[name][old]
+            merged[rows] = computed
+            metrics[name] = merged
+        return MetricTable(keys, values, lookback, baseline, metrics, len(rows))
+
+    def _rows(self, keys):
+        if keys is None:
+            return np.arange(len(self.keys))
+        rows = self.keys.get_indexer(list(keys))
+        return rows[rows >= 0]
+
+    def combined(self, keys=None, label=ALL_PROJECTS):
+        """A one-row table for the sum of `keys` (all rows when None)."""
+        if keys is None and self._total is not None:
+            return self._total
+        rows = self._rows(keys)
+
+        def summed(matrix):
+            picked = matrix[rows]
+            total = np.nansum(picked, axis=0, keepdims=True)
+            total[np.isnan(picked).all(axis=0, keepdims=True)] = np.nan
+            return total
+
+        table = MetricTable([label], summed(self.values), summed(self.lookback), summed(self.baseline))
+        if keys is None:
+            self._total = table
+        return table
+
+    def frame(self, keys=None, months=None, key_name="Key"):
+        """Long frame: key (unless key_name is None), Month and every metric, for the given rows and months."""
+        rows, cols = self._rows(keys), _month_positions(months)
+        columns = {} if key_name is None else {key_name: np.repeat(self.keys[rows].to_numpy(), len(cols))}
+        columns["Month"] = pd.Categorical.from_codes(np.tile(cols, len(rows)), dtype=FactTable.MONTH_DTYPE)
+        for name in COLUMNS:
+            columns[name] = self.metrics[name][np.ix_(rows, cols)].ravel()
+        return pd.DataFrame(columns)
+
+    def at(self, month, row=0):
+        """{metric: value} for one row and month."""
+        col = MONTHS.index(FactTable.canonical_month(month))
+        return {name: float(self.metrics[name][row, col]) for name in COLUMNS}
+
+    def latest_month(self):
+        """Last month with a value in any row, or None."""
+        present = np.flatnonzero(~np.isnan(self.values).all(axis=0))
+        return MONTHS[present[-1]] if len(present) else None
+
+
+# ---- Inputs ----
+
+def _by_month(frame):
+    # a Month-column frame -> rows x 12 floats in calendar order
+    return frame.reindex(columns=pd.CategoricalIndex(MONTHS, dtype=FactTable.MONTH_DTYPE)).to_numpy(dtype="float64")
+
+
+def year_inputs(year_totals):
+    """(years, values, lookback, baseline) from RevenueCube's Month x Year totals."""
+    years = list(year_totals.columns)
+    values = _by_month(year_totals.T)
+    baseline = np.full(values.shape, np.nan)
+    follows = np.array([isinstance(a, (int, np.integer)) and b == a + 1 for a, b in zip(years, years[1:])], dtype=bool)
+    baseline[1:][follows] = values[:-1][follows]
+    return years, values, baseline[:, -LOOKBACK:], baseline
+
+
+def project_inputs(cube, excel_file=None, scope=None):
+    """(projects, values, lookback, baseline): live-year Actuals per project and last year's partition.
+
+    scope: (dimension, member) the cube was filtered on, applied to last year's facts too.
+    """
+    actuals = cube[cube["Metric"] == "Actuals"]
+    # rows without a project name stay in (as a NaN key) so totals match the cube
+    by_project = actuals.groupby(["Project Name", "Month"], observed=True, dropna=False)["Value"].sum().unstack("Month")
+    values = _by_month(by_project)
+    baseline = np.full(values.shape, np.nan)
+    if (LIVE_YEAR - 1, "Actuals") in set(PartitionStore.partitions(excel_file)):
+        if scope is None:
+            last_year = PartitionStore.project_month_totals(LIVE_YEAR - 1, "Actuals", excel_file)
+        else:
+            facts = PartitionStore.load(LIVE_YEAR - 1, "Actuals", excel_file)
+            facts = facts[facts[scope[0]] == scope[1]] if scope[0] in facts.columns else facts.iloc[:0]
+            last_year = facts.groupby(["Project Name", "Month"], observed=True)["Value"].sum().reset_index()
+        last_year = last_year.set_index(["Project Name", "Month"])["Value"].unstack("Month")
+        baseline = _by_month(last_year.reindex(by_project.index))
+    return list(by_project.index), values, baseline[:, -LOOKBACK:], baseline
+
+
+def _metric_table(inputs, previous):
+    return MetricTable(*inputs) if previous is None else previous.update(*inputs)
+
+
+def build_year_metrics(year_totals, previous=None):
+    """Year MetricTable; given the last built one, only changed years are recomputed."""
+    return _metric_table(year_inputs(year_totals), previous)
+
+
+def build_project_metrics(cube, excel_file=None, scope=None, previous=None):
+    """Project MetricTable; given the last built one, only changed projects are recomputed."""
+    return _metric_table(project_inputs(cube, excel_file, scope), previous)
+
+
+# ---- Dashboard reads (published by the RefreshWorker, built inline otherwise) ----
+
+def year_metrics(excel_file=None):
+    """MetricTable with one row per year (Sheet3 / Actuals partitions)."""
+    name = RevenueCube.partitioned_name("analytics:years", excel_file)
+    return DataStore.derived(
+        name,
+        lambda: build_year_metrics(
+            RevenueCube.get_year_totals(excel_file, stale_ok=False), DataStore.latest(name, excel_file)
+        ),
+        excel_file, stale_ok=True,
+    )
+
+
+def project_metrics(excel_file=None):
+    """MetricTable with one row per project for the live year (Sheet1 Actuals)."""
+    name = RevenueCube.partitioned_name("analytics:projects", excel_file)
+    return DataStore.derived(
+        name,
+        lambda: build_project_metrics(
+            RevenueCube.get_cube(excel_file, stale_ok=False), excel_file, previous=DataStore.latest(name, excel_file)
+        ),
+        excel_file, stale_ok=True,
+    )
+
+
+def monthly(projects=None, months=None, excel_file=None):
+    """Month and every metric for the summed Actuals of `projects` (all when None)."""
+    table = project_metrics(excel_file).combined(projects)
+    return table.frame(months=months, key_name=None)
+
+
+def year_over_year(months, excel_file=None):
+    """Year, Revenue and Revenue_M over the selected months, with Delta_M / Delta % against the previous listed year."""
+    table = year_metrics(excel_file)
+    revenue = np.nansum(table.values[:, _month_positions(months)], axis=1)
+    delta = revenue - np.concatenate([[np.nan], revenue[:-1]])
+    return pd.DataFrame({
+        "Year": table.keys, "Revenue": revenue, "Revenue_M": revenue / 1_000_000,
+        "Delta_M": delta / 1_000_000, "Delta %": _pct(delta, revenue - delta),
+    })
+
+
+def build_artifacts(artifacts, excel_file=None):
+    """Metric tables from a RefreshWorker's freshly built cube and year totals, updating the published ones."""
+    years = RevenueCube.partitioned_name("analytics:years", excel_file)
+    projects = RevenueCube.partitioned_name("analytics:projects", excel_file)
+    return {
+        years: build_year_metrics(
+            artifacts[RevenueCube.partitioned_name("year_totals", excel_file)], DataStore.latest(years, excel_file)
+        ),
+        projects: build_project_metrics(
+            artifacts["revenue_cube"], excel_file, previous=DataStore.latest(projects, excel_file)
+        ),
+    }
+
+
+def main(argv):
+    excel_file = argv[0] if argv else None
+    cube = RevenueCube.build_revenue_cube(excel_file)
+    start = time.perf_counter()
+    table = build_project_metrics(cube, excel_file)
+    elapsed = time.perf_counter() - start
+    print(f"{len(table)} projects: metric table built in {elapsed * 1000:.2f} ms")
+    # one project's actuals edited: only its row is recomputed
+    edited = cube.copy()
+    edited.loc[(edited["Metric"] == "Actuals").idxmax(), "Value"] += 1
+    start = time.perf_counter()
+    updated = build_project_metrics(edited, excel_file, previous=table)
+    elapsed = time.perf_counter() - start
+    print(f"one project edited: {updated.recomputed} row(s) recomputed in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,213 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+
+import DataStore
+import StorageBackend
+
+# Sign-in against the workbook's Authenticate sheet (EmpID, EmpPassword, Role).
+# Once per data version the sheet is read straight from the backend (it is one of
+# StorageBackend.PRIVATE_SHEETS: never in DataStore's cache or the Feather snapshot) and
+# turned into a CredentialIndex: EmpID -> (keyed SHA-256 of the password, role); the frame
+# is dropped right after, so the process keeps no plaintext password. A sign-in is one
+# dict lookup plus hmac.compare_digest, with no row scan. The index is only rebuilt when
+# the Authenticate rows themselves change, not on every Sheet1 edit.
+#
+# A successful sign-in issues a session token (kept in st.session_state by LandingPage).
+# Checking it on a rerun is a dict lookup and a clock compare; only after TOKEN_TTL_S is
+# the user re-checked against the current index, so a removed user, changed password or
+# changed role takes effect within that window. An expired token can be renewed that way
+# for RENEW_WINDOW_S more; after that it is dropped and the user has to sign in again.
+#
+# REVENUE_AUTH=off turns sign-in off (single-user local runs).
+# Index build and lookup timings: python AuthService.py [workbook]
+
+AUTH_SHEET = "Authenticate"
+AUTH_ENABLED = os.environ.get("REVENUE_AUTH", "on").lower() not in ("off", "0", "false", "no")
+TOKEN_TTL_S = 15 * 60
+RENEW_WINDOW_S = 15 * 60
+SESSION_KEY = "auth_token"
+
+# lowest to highest; a role can open every page the roles below it can
+ROLES = ["Viewer", "Contributor", "Admin"]
+
+# per-process key: digests are useless outside this process
+_KEY = secrets.token_bytes(32)
+_lock = threading.Lock()
+_tokens = {}  # token -> Session
+_last_index = None
+
+
+def _digest(password):
+    return hmac.new(_KEY, str(password).encode("utf-8"), hashlib.sha256).digest()
+
+
+# compared against when the EmpID is unknown, so a miss takes as long as a wrong password
+_NO_USER = _digest(secrets.token_hex(16))
+
+
+def normalize_id(value):
+    """EmpID as text: 212121, 212121.0 and " 212121 " are the same user; None if blank."""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def role_rank(role):
+    """Position of `role` in ROLES (-1 if it isn't one)."""
+    return ROLES.index(role) if role in ROLES else -1
+
+
+class Session:
+    __slots__ = ("emp_id", "role", "digest", "expires")
+
+    def __init__(self, emp_id, role, digest, expires):
+        self.emp_id = emp_id
+        self.role = role
+        self.digest = digest
+        self.expires = expires
+
+
+class CredentialIndex:
+    def __init__(self, users, fingerprint):
+        self._users = users  # EmpID -> (digest, role)
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def fingerprint_of(sheet):
+        # keyed like the digests, so the stored fingerprint reveals nothing about the sheet
+        return hmac.new(_KEY, sheet.to_csv(index=False).encode("utf-8"), hashlib.sha256).hexdigest()
+
+    @classmethod
+    def build(cls, sheet, fingerprint=None):
+        """Index an Authenticate frame; rows without an EmpID or password are left out.
+
+        A repeated EmpID keeps its first row.
+        """
+        users = {}
+        for emp_id, password, role in zip(sheet["EmpID"], sheet["EmpPassword"], sheet["Role"]):
+            emp_id, password = normalize_id(emp_id), normalize_id(password)
+            if emp_id is None or password is None or emp_id in users:
+                continue
+            users[emp_id] = (_digest(password), str(role).strip())
+        return cls(users, fingerprint or cls.fingerprint_of(sheet))
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, emp_id):
+        return normalize_id(emp_id) in self._users
+
+    def entry(self, emp_id):
+        """(digest, role) for `emp_id`, or None."""
+        return self._users.get(normalize_id(emp_id))
+
+    def verify(self, emp_id, password):
+        """The user's role if the password matches, else None."""
+        entry = self.entry(emp_id)
+        expected = entry[0] if entry else _NO_USER
+        matched = hmac.compare_digest(expected, _digest(normalize_id(password) or ""))
+        return entry[1] if matched and entry else None
+
+
+def _read_sheet(excel_file=None):
+    # uncached read; callers keep only what they derive from it
+    return StorageBackend.get_backend(excel_file).read_sheet(AUTH_SHEET)
+
+
+def _build_index(excel_file=None):
+    global _last_index
+    sheet = _read_sheet(excel_file)
+    fingerprint = CredentialIndex.fingerprint_of(sheet)
+    # a new data version from a Sheet1 edit leaves the credentials as they were
+    if _last_index is not None and _last_index.fingerprint == fingerprint:
+        return _last_index
+    _last_index = CredentialIndex.build(sheet, fingerprint)
+    return _last_index
+
+
+def credential_index(excel_file=None):
+    """The CredentialIndex for the current data version."""
+    return DataStore.derived(f"credential_index:{AUTH_SHEET}", lambda: _build_index(excel_file), excel_file)
+
+
+def _renewable(session, now):
+    return now < session.expires + RENEW_WINDOW_S
+
+
+def _prune(now):
+    for token in [token for token, session in _tokens.items() if not _renewable(session, now)]:
+        del _tokens[token]
+
+
+def login(session_state, emp_id, password, excel_file=None):
+    """Check the credentials; on success store a token in session_state and return the role."""
+    role = credential_index(excel_file).verify(emp_id, password)
+    if role is None:
+        return None
+    token = secrets.token_urlsafe(32)
+    now = time.monotonic()
+    with _lock:
+        _prune(now)
+        _tokens[token] = Session(normalize_id(emp_id), role, _digest(normalize_id(password)), now + TOKEN_TTL_S)
+    session_state[SESSION_KEY] = token
+    return role
+
+
+def current_user(session_state, excel_file=None):
+    """(EmpID, role) of the signed-in user, or None. Cheap enough to call on every rerun."""
+    token = session_state.get(SESSION_KEY)
+    session = _tokens.get(token) if token else None
+    if session is None:
+        return None
+    now = time.monotonic()
+    if now < session.expires:
+        return session.emp_id, session.role
+    # expired: renew only within the window and if the user still has the same password and role
+    entry = credential_index(excel_file).entry(session.emp_id) if _renewable(session, now) else None
+    with _lock:
+        if entry is None or not hmac.compare_digest(entry[0], session.digest) or entry[1] != session.role:
+            _tokens.pop(token, None)
+            session_state.pop(SESSION_KEY, None)
+            return None
+        session.expires = now + TOKEN_TTL_S
+    return session.emp_id, session.role
+
+
+def logout(session_state):
+    token = session_state.pop(SESSION_KEY, None)
+    with _lock:
+        _tokens.pop(token, None)
+
+
+def active_sessions():
+    with _lock:
+        _prune(time.monotonic())
+        return len(_tokens)
+
+
+def main(argv):
+    excel_file = argv[0] if argv else None
+    sheet = _read_sheet(excel_file)
+    start = time.perf_counter()
+    index = CredentialIndex.build(sheet)
+    built = time.perf_counter() - start
+
+    emp_id = next(iter(index._users), "0")
+    rounds = 10000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        index.verify(emp_id, "wrong password")
+    lookup = (time.perf_counter() - start) / rounds
+    print(f"{len(index)} users indexed in {built * 1000:.2f} ms; verify {lookup * 1e6:.1f} µs per attempt")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import DataStore
+import Journal
+import ProjectIndex
+import RevenueCube
+import SheetWriter
+import SnapshotCompiler
+import SyntheticData
+
+# Benchmark harness for the dashboard pages.
+# Generates synthetic BaseDatasheet.xlsx files (same Sheet1/Sheet3 schema) at increasing
+# sizes, drives every page headlessly through streamlit's AppTest and records cold/warm
+# page runs, data load, aggregation, chart-building and save times to a JSON file.
+#
+#   python BenchmarkSuite.py                         # 1k, 10k, 100k rows
+#   python BenchmarkSuite.py --sizes 1000 10000 --output before.json
+#   python BenchmarkSuite.py --compare before.json after.json
+
+SIZES = (1_000, 10_000, 100_000)
+WORKDIR = ".bench"
+RESULTS_DIR = "bench_results"
+REPEAT = 3
+
+_CHART_CALLS = ("altair_chart", "plotly_chart", "vega_lite_chart")
+
+
+def _page_script(body):
+    # Each AppTest run points the storage layer at the synthetic workbook first, with
+    # sign-in off so LandingPage renders the dashboard rather than the login form
+    return (
+        "import os\n"
+        "os.environ['REVENUE_AUTH'] = 'off'\n"
+        "import StorageBackend\n"
+        "StorageBackend.configure(StorageBackend.ExcelBackend(os.environ['REVENUE_BENCH_WORKBOOK']))\n"
+        + body
+    )
+
+
+def _check_all(at, keys):
+    present = {box.key for box in at.checkbox}
+    for key in keys:
+        if key in present:
+            at.checkbox(key=key).check()
+
+
+PAGES = {
+    "Home": (
+        "import runpy\nrunpy.run_path('LandingPage.py')\n",
+        None,
+    ),
+    "ActualsByMonth": (
+        "import ActualsByMonth\nActualsByMonth.show_page()\n",
+        lambda at, months: _check_all(at, [f"{m} Actuals" for m in months]),
+    ),
+    "ActualsByYear": (
+        "import ActualsByYear\nActualsByYear.show_page()\n",
+        None,
+    ),
+    "ActualsVsForecast": (
+        "import ActualsVsForecast\nActualsVsForecast.show_page()\n",
+        lambda at, months: _check_all(at, [f"month_{m}" for m in months]),
+    ),
+    "UpdateActuals": (
+        "import UpdatingActualsWithFilter\nUpdatingActualsWithFilter.show_page()\n",
+        None,
+    ),
+    "UpdatingActuals": (
+        "import runpy\nrunpy.run_path('UpdatingActuals.py')\n",
+        None,
+    ),
+}
+
+
+@contextmanager
+def _timed_charts(totals):
+    """Accumulate time spent turning figures into chart specs (st.altair_chart & co)."""
+    patches = []
+    for name in _CHART_CALLS:
+        original = getattr(st, name)
+
+        def wrapper(*args, _original=original, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                totals.append(time.perf_counter() - start)
+
+        patches.append(mock.patch.object(st, name, wrapper))
+    for patch in patches:
+        patch.start()
+    try:
+        yield
+    finally:
+        for patch in patches:
+            patch.stop()
+
+
+def _reset_caches(workbook, drop_snapshot=False):
+    DataStore.clear_cache()
+    if drop_snapshot:
+        shutil.rmtree(os.path.join(os.path.dirname(os.path.abspath(workbook)), SnapshotCompiler.SNAPSHOT_DIR), ignore_errors=True)
+
+
+def _best(fn, repeat=REPEAT):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def bench_data_layer(workbook):
+    result = {}
+
+    _reset_caches(workbook, drop_snapshot=True)
+    start = time.perf_counter()
+    df = DataStore.load_sheet("Sheet1", workbook)
+    DataStore.load_sheet("Sheet3", workbook)
+    result["load_cold_xlsx_s"] = time.perf_counter() - start
+
+    def snapshot_load():
+        _reset_caches(workbook)
+        DataStore.load_sheet("Sheet1", workbook)
+        DataStore.load_sheet("Sheet3", workbook)
+
+    result["load_cold_snapshot_s"] = _best(snapshot_load)
+    result["load_warm_s"] = _best(lambda: (DataStore.load_sheet("Sheet1", workbook), DataStore.load_sheet("Sheet3", workbook)))
+
+    sheet3 = DataStore.load_sheet("Sheet3", workbook)
+    result["aggregate_cube_s"] = _best(lambda: RevenueCube.build_cube(df))
+    result["aggregate_year_cube_s"] = _best(lambda: RevenueCube.build_year_cube(sheet3))
+    result["project_index_s"] = _best(lambda: ProjectIndex.ProjectIndex.build(df["Project Name"]))
+    result["rows"] = len(df)
+    return result
+
+
+def bench_page(name, workbook, months, timeout):
+    script, interact = PAGES[name]
+    os.environ["REVENUE_BENCH_WORKBOOK"] = os.path.abspath(workbook)
+    result = {}
+
+    _reset_caches(workbook)
+    chart_times = []
+    with _timed_charts(chart_times):
+        at = AppTest.from_string(_page_script(script), default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        result["cold_s"] = time.perf_counter() - start
+
+        warm = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            at.run()
+            warm.append(time.perf_counter() - start)
+        result["warm_s"] = min(warm)
+
+        if interact is not None:
+            interact(at, months)
+            start = time.perf_counter()
+            at.run()
+            result["interactive_rerun_s"] = time.perf_counter() - start
+
+    result["chart_build_s"] = sum(chart_times)
+    result["chart_calls"] = len(chart_times)
+    result["exceptions"] = [e.message for e in at.exception]
+    return result
+
+
+def bench_saves(workbook, tmp_dir):
+    result = {}
+    copy = os.path.join(tmp_dir, "save_" + os.path.basename(workbook))
+    shutil.copyfile(workbook, copy)
+    df = DataStore.load_sheet("Sheet1", copy)
+    project = df["Project Name"].dropna().iloc[0]
+    edited = df[df["Project Name"] == project].copy()
+    edited["Jan Actuals"] = edited["Jan Actuals"].fillna(0) + 1
+
+    start = time.perf_counter()
+    result["edited_cells"] = SheetWriter.save_changes(df, edited, copy, "Sheet1")
+    result["save_changes_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Journal.append({"ServiceLine": "QEA", "AssociateID": "BENCH1", "Project Name": project}, excel_file=copy)
+    result["journal_append_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Journal.compact(copy)
+    result["journal_compact_s"] = time.perf_counter() - start
+    return result
+
+
+def run(sizes, workdir=WORKDIR, timeout=600):
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    for rows in sizes:
+        workbook = os.path.join(workdir, f"BaseDatasheet_{rows}.xlsx")
+        if not os.path.exists(workbook):
+            print(f"Generating {workbook} ...", flush=True)
+            SyntheticData.make_workbook(workbook, rows=rows)
+
+        print(f"[{rows} rows] data layer", flush=True)
+        entry = {"data": bench_data_layer(workbook), "pages": {}}
+        months = RevenueCube.months(RevenueCube.get_cube(workbook), "Actuals")
+        for name in PAGES:
+            print(f"[{rows} rows] page {name}", flush=True)
+            entry["pages"][name] = bench_page(name, workbook, months, timeout)
+        print(f"[{rows} rows] saves", flush=True)
+        entry["saves"] = bench_saves(workbook, workdir)
+        results[str(rows)] = entry
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(before_path, after_path):
+    with open(before_path, encoding="utf-8") as fh:
+        before = json.load(fh)
+    with open(after_path, encoding="utf-8") as fh:
+        after = json.load(fh)
+    old = _flatten("", before["results"], {})
+    new = _flatten("", after["results"], {})
+    print(f"{before['commit']} -> {after['commit']}")
+    print(f"{'metric':<60}{'before':>12}{'after':>12}{'change':>10}")
+    for key in sorted(old.keys() & new.keys()):
+        if not key.endswith("_s"):
+            continue
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{key:<60}{old[key]:>12.4f}{new[key]:>12.4f}{change:>+9.1f}%")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard pages on synthetic workbooks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--output", help="JSON result file (default bench_results/<commit>.json)")
+    parser.add_argument("--timeout", type=float, default=600, help="per-run AppTest timeout (s)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = _git_commit()
+    results = run(args.sizes, timeout=args.timeout)
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Wrote {output}")
+
+    for rows, entry in results.items():
+        pages = ", ".join(f"{name} {res['warm_s'] * 1000:.0f}ms" for name, res in entry["pages"].items())
+        print(f"{rows:>7} rows | warm: {pages}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
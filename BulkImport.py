@@ -0,0 +1,229 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import DataStore
+import FactTable
+import SheetWriter
+import StorageBackend
+
+# Bulk uploads of associates (new Sheet1 rows) or monthly actuals (updates to existing rows).
+# A CSV/XLSX is validated column-wise in one pass: blanks, allowed ServiceLine / PracticeLine
+# / Region / Project Name values, numeric month values, keys repeated in the file, already in
+# Sheet1 (associates) or missing from it (actuals). Every problem is reported against the
+# file row it came from; rows with problems are never written.
+#
+# A batch is one write: new associates go to the backend in a single append (one journal
+# line for the workbook, one insert_many for MongoDB) and actuals are saved with one
+# save_changes call (one workbook save or one bulk_write), conflict-checked like the editor.
+#
+#   python BulkImport.py associates new_joiners.csv [--new-project "Orion"] [--skip-invalid]
+#   python BulkImport.py actuals march_actuals.xlsx [--dry-run]
+
+# Choices offered by the Add User form; values already present in Sheet1 are accepted too
+SERVICE_LINES = ["QEA", "SPE", "UI/UX"]
+PRACTICE_LINES = ["NFT", "SRE", "QTP"]
+REGIONS = ["NA", "APAC", "EU"]
+PROJECTS = ["QTest", "Ptest", "Rtest", "Srest", "Trest", "Urest", "Vrest", "Wrest", "Xrest", "Yrest", "Zrest"]
+
+ALLOWED = {
+    "ServiceLine": SERVICE_LINES,
+    "PracticeLine": PRACTICE_LINES,
+    "Region": REGIONS,
+    "Project Name": PROJECTS,
+}
+KINDS = ["associates", "actuals"]
+REQUIRED = {
+    "associates": ["AssociateName", "AssociateID", "Project Name", "ServiceLine", "PracticeLine", "Region"],
+    "actuals": ["AssociateID", "Project Name"],
+}
+KEY = list(SheetWriter.KEY_COLUMNS)
+ERROR_COLUMNS = ["Row", "Column", "Value", "Error"]
+FIRST_DATA_ROW = 2  # file row of the first record, below the header
+
+
+def read_upload(source, name=None):
+    """Upload as text columns (stripped, blanks as NaN), indexed by position in the file.
+
+    Only empty cells are blank: "NA" is the North America region, not a missing value.
+    """
+    name = name or getattr(source, "name", str(source))
+    if str(name).lower().endswith((".xlsx", ".xlsm", ".xls")):
+        df = pd.read_excel(source, dtype=str, keep_default_na=False, na_values=[""])
+    else:
+        df = pd.read_csv(source, dtype=str, keep_default_na=False, na_values=[""], skip_blank_lines=False)
+    df.columns = [str(col).strip() for col in df.columns]
+    df = df.apply(lambda col: col.str.strip()).replace("", np.nan)
+    return df.dropna(how="all")
+
+
+def allowed_values(sheet1, new_projects=()):
+    """{column: set of accepted values}: the form's choices plus what Sheet1 already holds."""
+    allowed = {}
+    for col, choices in ALLOWED.items():
+        values = set(choices)
+        if col in sheet1.columns:
+            values.update(sheet1[col].dropna().astype(str))
+        allowed[col] = values
+    allowed["Project Name"].update(new_projects)
+    return allowed
+
+
+def _keys(frame):
+    return pd.MultiIndex.from_arrays([frame[col].astype("string").str.strip() for col in KEY], names=KEY)
+
+
+def _month_targets(upload_columns, sheet_columns, metrics):
+    # upload month column -> Sheet1 column for the same month and metric ("January Actuals" -> "Jan Actuals")
+    sheet_months = {(month, metric): col for col, month, metric in FactTable.month_columns(sheet_columns)}
+    return {
+        col: sheet_months[(month, metric)]
+        for col, month, metric in FactTable.month_columns(upload_columns)
+        if metric in metrics and (month, metric) in sheet_months
+    }
+
+
+def _errors(upload, problems):
+    frames = []
+    for mask, column, message in problems:
+        positions = np.flatnonzero(mask)
+        if not len(positions):
+            continue
+        values = upload[column].iloc[positions].to_numpy() if column in upload.columns else ""
+        frames.append(pd.DataFrame({
+            "Row": upload.index[positions] + FIRST_DATA_ROW, "Column": column, "Value": values, "Error": message,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values("Row", kind="stable").reset_index(drop=True)
+
+
+def validate(upload, kind, sheet1=None, new_projects=()):
+    """Check an upload; returns a result dict for apply_import.
+
+    result["errors"] has one line per problem (file Row, Column, Value, Error) and
+    result["valid"] the rows without any. A missing required column raises ValueError.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown import kind '{kind}' (expected one of {', '.join(KINDS)})")
+    missing = [col for col in REQUIRED[kind] if col not in upload.columns]
+    if missing:
+        raise ValueError(f"Upload is missing required column(s): {', '.join(missing)}")
+    sheet1 = DataStore.load_sheet("Sheet1") if sheet1 is None else sheet1
+
+    metrics = FactTable.METRICS if kind == "associates" else ["Actuals"]
+    months = _month_targets(upload.columns, sheet1.columns, metrics)
+    if kind == "actuals" and not months:
+        raise ValueError("Upload has no month Actuals column matching Sheet1 (e.g. 'Jan Actuals')")
+    repeated = sorted({target for target in months.values() if list(months.values()).count(target) > 1})
+    if repeated:
+        raise ValueError(f"Several upload columns fill the same Sheet1 column: {', '.join(repeated)}")
+    keep = set(REQUIRED[kind]) | set(months)
+    if kind == "associates":
+        keep |= {col for col in upload.columns if col in sheet1.columns}
+    ignored = [col for col in upload.columns if col not in keep]
+
+    problems = []
+    for col in REQUIRED[kind]:
+        problems.append((upload[col].isna(), col, f"{col} is blank"))
+
+    values = {col: pd.to_numeric(upload[col], errors="coerce") for col in months}
+    for col, numbers in values.items():
+        problems.append((upload[col].notna() & numbers.isna(), col, "Not a number"))
+
+    has_key = upload[KEY].notna().all(axis=1)
+    problems.append((has_key & upload.duplicated(KEY, keep=False), "AssociateID", "Repeated in this file (same AssociateID and Project Name)"))
+    upload_keys = _keys(upload)
+    sheet_keys = _keys(sheet1)
+
+    if kind == "associates":
+        for col, accepted in allowed_values(sheet1, new_projects).items():
+            if col in upload.columns:
+                problems.append((upload[col].notna() & ~upload[col].isin(accepted), col, f"Unknown {col}"))
+        problems.append((has_key & upload_keys.isin(sheet_keys), "AssociateID", "Already in Sheet1"))
+    else:
+        ambiguous = sheet_keys.duplicated(keep=False)
+        # Sheet1 position per upload row (NaN: no row, or several)
+        target = pd.Series(np.flatnonzero(~ambiguous), index=sheet_keys[~ambiguous]).reindex(upload_keys).to_numpy()
+        several = upload_keys.isin(sheet_keys[ambiguous])
+        problems.append((has_key & several, "AssociateID", "Matches several Sheet1 rows"))
+        problems.append((has_key & ~several & np.isnan(target), "AssociateID", "No Sheet1 row with this AssociateID and Project Name"))
+        problems.append((pd.DataFrame(values).isna().all(axis=1), "AssociateID", "No month values to update"))
+
+    errors = _errors(upload, problems)
+    valid = upload.assign(**{col: values[col] for col in months})
+    valid = valid.drop(index=errors["Row"].unique() - FIRST_DATA_ROW)
+
+    result = {"kind": kind, "rows": len(upload), "errors": errors, "ignored_columns": ignored, "sheet1": sheet1}
+    if kind == "associates":
+        valid = valid.drop(columns=ignored).rename(columns=months)
+        result["valid"] = valid
+    else:
+        # the matched Sheet1 rows with the uploaded values; a blank upload cell keeps the sheet value
+        positions = target[upload.index.get_indexer(valid.index)].astype(np.intp)
+        edited = sheet1.iloc[positions][list(months.values())].astype("float64")
+        updates = valid[list(months)].rename(columns=months).set_axis(edited.index)
+        result["valid"] = updates.combine_first(edited)[list(edited.columns)]
+    return result
+
+
+def apply_import(result):
+    """Write the valid rows of a validated upload as one batch; returns rows added or cells changed."""
+    valid = result["valid"]
+    if valid.empty:
+        return 0
+    backend = StorageBackend.get_backend()
+    if result["kind"] == "associates":
+        rows = [
+            {col: value for col, value in record.items() if not pd.isna(value)}
+            for record in valid.to_dict("records")
+        ]
+        backend.append_rows(rows, sheet_name="Sheet1")
+        return len(rows)
+
+    sheet1 = result["sheet1"]
+    return backend.save_changes(
+        sheet1, valid, "Sheet1",
+        base_version=sheet1.attrs.get("data_version"), base_values=SheetWriter.cell_values(sheet1, valid),
+    )
+
+
+def import_file(source, kind, new_projects=(), skip_invalid=False, dry_run=False):
+    """Validate and (unless there are errors or dry_run) apply one upload; returns the result dict."""
+    result = validate(read_upload(source), kind, new_projects=new_projects)
+    result["written"] = 0
+    if not dry_run and (skip_invalid or result["errors"].empty):
+        result["written"] = apply_import(result)
+    return result
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Bulk import associates or monthly actuals into Sheet1")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("file", help="CSV or XLSX upload")
+    parser.add_argument("--new-project", action="append", default=[], help="accept this new Project Name")
+    parser.add_argument("--skip-invalid", action="store_true", help="import the valid rows even if others fail")
+    parser.add_argument("--dry-run", action="store_true", help="validate only")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = import_file(args.file, args.kind, args.new_project, args.skip_invalid, args.dry_run)
+    elapsed = time.perf_counter() - start
+    errors = result["errors"]
+    if not errors.empty:
+        print(errors.to_string(index=False))
+    if result["ignored_columns"]:
+        print(f"Ignored columns: {', '.join(result['ignored_columns'])}")
+    unit = "row(s) added" if args.kind == "associates" else "cell(s) updated"
+    print(
+        f"{result['rows']} row(s) read, {len(result['valid'])} valid, {errors['Row'].nunique()} with errors; "
+        f"{result['written']} {unit} in {elapsed:.2f}s"
+    )
+    return 1 if not errors.empty and not args.skip_invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+import streamlit as st
+
+import BulkImport
+import DataStore
+import Profiler
+from WriteCoordinator import WriteConflict
+
+KINDS = {"Associates": "associates", "Monthly Actuals": "actuals"}
+
+
+def _validated(upload, kind, new_projects):
+    # one validation per file / settings / data version, not per rerun
+    key = (upload.file_id, kind, tuple(new_projects), DataStore.data_version())
+    cached = st.session_state.get("bulk_import_result")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with Profiler.stage("filter"):
+        result = BulkImport.validate(BulkImport.read_upload(upload, upload.name), kind, new_projects=new_projects)
+    st.session_state["bulk_import_result"] = (key, result)
+    return result
+
+
+def show_page():
+    st.title("📥 Bulk Import")
+
+    label = st.radio("Import", list(KINDS), horizontal=True)
+    kind = KINDS[label]
+    if kind == "associates":
+        st.caption(
+            "New Sheet1 rows. Required columns: " + ", ".join(BulkImport.REQUIRED[kind])
+            + ". Optional: any other Sheet1 column, e.g. 'Jan Actuals'."
+        )
+        new_projects = [
+            name.strip() for name in st.text_input("New project name(s) in this file (comma-separated)").split(",")
+            if name.strip()
+        ]
+    else:
+        st.caption(
+            "Updates to existing rows, matched on AssociateID + Project Name. "
+            "Month columns such as 'Jan Actuals' or 'March Actuals'; a blank cell leaves the value as is."
+        )
+        new_projects = []
+
+    upload = st.file_uploader("CSV or Excel file", type=["csv", "xlsx"])
+    if upload is None:
+        return
+
+    try:
+        result = _validated(upload, kind, new_projects)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+
+    errors = result["errors"]
+    bad_rows = errors["Row"].nunique()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Rows", result["rows"])
+    c2.metric("Valid", len(result["valid"]))
+    c3.metric("With Errors", bad_rows)
+    if result["ignored_columns"]:
+        st.caption(f"Ignored columns: {', '.join(map(str, result['ignored_columns']))}")
+
+    if not errors.empty:
+        st.markdown("#### ⚠️ Problems")
+        st.dataframe(errors, hide_index=True, use_container_width=True)
+        st.download_button(
+            "⬇️ Download problems (CSV)", errors.to_csv(index=False), file_name="import_errors.csv", mime="text/csv"
+        )
+    skip_invalid = not errors.empty and st.checkbox(f"Import the valid rows and skip the {bad_rows} with errors")
+
+    ready = len(result["valid"]) and (errors.empty or skip_invalid)
+    if st.button(f"💾 Import {len(result['valid'])} row(s)", disabled=not ready):
+        try:
+            written = BulkImport.apply_import(result)
+        except WriteConflict as e:
+            st.error(f"⚠️ {e}. Upload the file again to validate it against the latest data.")
+            return
+        except Exception as e:
+            st.error(f"❌ Import failed: {e}")
+            return
+        st.session_state.pop("bulk_import_result", None)
+        if kind == "associates":
+            st.success(f"✅ Added {written} associate(s).")
+        else:
+            st.success(f"✅ Updated {written} cell(s).")
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+import DataStore
+import Profiler
+import StorageBackend
+
+# Memoized chart specs, keyed on (data version, page, chart, normalized filter selection).
+# Reruns that don't change a chart's filters (an unrelated widget moved, the view mode
+# flipped back) reuse the serialized spec instead of rebuilding Altair layer stacks or
+# Plotly figures. Bounded LRU; hit/miss counters are shown on the Settings page.
+#
+# Altair charts are cached as Vega-Lite dicts and drawn with st.vega_lite_chart.
+# Plotly figures are cached as built Figure objects: st.plotly_chart re-validates a plain
+# dict through go.Figure(), which costs about as much as building the figure again.
+
+MAX_ENTRIES = 128
+
+_lock = threading.Lock()
+_specs = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "build_seconds": 0.0}
+
+
+def _normalize(value):
+    """Hashable, order-insensitive form of a filter selection."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted((_normalize(v) for v in value), key=repr))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def get_spec(page, chart, filters, build, excel_file=None):
+    """Cached result of build() for this chart and filter selection at the current data version."""
+    backend = StorageBackend.get_backend(excel_file)
+    key = (backend.key, DataStore.view_version(excel_file), page, chart, _normalize(filters))
+    with _lock:
+        if key in _specs:
+            _specs.move_to_end(key)
+            _stats["hits"] += 1
+            return _specs[key]
+
+    start = time.perf_counter()
+    with Profiler.stage("chart build"):
+        spec = build()
+    elapsed = time.perf_counter() - start
+
+    with _lock:
+        _stats["misses"] += 1
+        _stats["build_seconds"] += elapsed
+        _specs[key] = spec
+        while len(_specs) > MAX_ENTRIES:
+            _specs.popitem(last=False)
+            _stats["evictions"] += 1
+    return spec
+
+
+def altair_chart(page, chart, filters, build, **kwargs):
+    """st.altair_chart replacement: build() returns an Altair chart, drawn from its cached spec."""
+    spec = get_spec(page, chart, filters, lambda: build().to_dict())
+    with Profiler.stage("chart render"):
+        st.vega_lite_chart(spec, **kwargs)
+
+
+def plotly_chart(page, chart, filters, build, **kwargs):
+    """st.plotly_chart replacement: build() returns a Plotly figure, reused while filters match."""
+    figure = get_spec(page, chart, filters, build)
+    with Profiler.stage("chart render"):
+        st.plotly_chart(figure, **kwargs)
+
+
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_specs)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_cache():
+    with _lock:
+        _specs.clear()
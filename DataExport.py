@@ -0,0 +1,172 @@
+import glob
+import hashlib
+import os
+import sys
+import time
+
+import pyarrow as pa  # ships with streamlit
+import pyarrow.parquet as pq
+import streamlit as st
+
+import DataStore
+import PartitionStore
+import Profiler
+import RevenueCube
+import StorageBackend
+
+# On-demand CSV / Parquet exports.
+# Nothing is serialized while a page renders: the file is only built when the user clicks
+# "Prepare", written to disk chunk by chunk (CSV blocks / Parquet row groups) and named
+# by data version + selection, so repeat requests for the same data reuse the file.
+# Files of other versions / selections are removed once unused for EXPORT_MAX_AGE_S, so
+# another session that was just handed one can still open it.
+#
+#   python DataExport.py sheet1 Sheet1.parquet
+#   python DataExport.py projects ProjectActualsForecast.csv
+
+EXPORT_DIR = ".exports"
+CHUNK_ROWS = 50_000
+EXPORT_MAX_AGE_S = 10 * 60
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def _chunks(df, chunk_rows=CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, path, chunk_rows=CHUNK_ROWS):
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        for start, chunk in _chunks(df, chunk_rows):
+            chunk.to_csv(fh, index=False, header=start == 0)
+
+
+def _parquet_schema(df):
+    # Excel object columns can mix numbers and text; those are written as strings.
+    # Types come from one column at a time so the frame itself is never copied.
+    fields, text_cols = [], []
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                dtype = pa.array(df[col], from_pandas=True).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                dtype = pa.string()
+                text_cols.append(col)
+        else:
+            dtype = pa.Schema.from_pandas(df[[col]].head(0), preserve_index=False).field(0).type
+        fields.append(pa.field(str(col), dtype))
+    return pa.schema(fields), text_cols
+
+
+def write_parquet(df, path, chunk_rows=CHUNK_ROWS):
+    schema, text_cols = _parquet_schema(df)
+    with pq.ParquetWriter(path, schema) as writer:
+        for _, chunk in _chunks(df, chunk_rows):
+            chunk = chunk.astype({col: "string" for col in text_cols}).set_axis(schema.names, axis=1)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+_WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+def export_file(name, fmt, build, selection=None, excel_file=None):
+    """Path of `name` exported as fmt ("CSV"/"Parquet"); build() only runs if no file exists yet.
+
+    Files are keyed on DataStore.view_version, the version that stale_ok aggregates (the
+    frames pages export) reflect, so a stale frame is never filed under a newer version,
+    and on the partition stamp, which year exports also depend on.
+    """
+    ext, _ = FORMATS[fmt]
+    backend = StorageBackend.get_backend(excel_file)
+    version = (DataStore.view_version(excel_file), PartitionStore.version(excel_file))
+    digest = hashlib.sha1(repr((backend.key, version, selection)).encode()).hexdigest()[:12]
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"{name}.{digest}.{ext}")
+    try:
+        os.utime(path)  # reused: restart its expiry
+        return path
+    except FileNotFoundError:
+        pass
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df = build()
+    with Profiler.stage("export"):
+        _WRITERS[ext](df, tmp_path)
+    os.replace(tmp_path, path)
+
+    # Other versions / selections of this export expire once nobody has asked for them lately
+    expired = time.time() - EXPORT_MAX_AGE_S
+    for old in glob.glob(os.path.join(EXPORT_DIR, f"{name}.*.{ext}")):
+        try:
+            if old != path and os.path.getmtime(old) < expired:
+                os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+def _open_export(name, fmt, build, selection):
+    # a file handed out can still expire before it is opened; build it again then
+    try:
+        return open(export_file(name, fmt, build, selection), "rb")
+    except FileNotFoundError:
+        return open(export_file(name, fmt, build, selection), "rb")
+
+
+def export_button(label, name, build, selection=None, key=None):
+    """Format picker + "Prepare" button; the download button only appears once the file exists."""
+    key = key or name
+    col1, col2 = st.columns([1, 2])
+    fmt = col1.radio("Format", list(FORMATS), horizontal=True, key=f"{key}_format")
+    if not col2.button(f"📦 Prepare {label}", key=f"{key}_prepare"):
+        return
+    with st.spinner("Writing export..."):
+        fh = _open_export(name, fmt, build, selection)
+    ext, mime = FORMATS[fmt]
+    with fh:
+        # on_click="ignore": downloading doesn't rerun the page and drop the button
+        col2.download_button(
+            label=f"📥 Download {label}",
+            data=fh,
+            file_name=f"{name}.{ext}",
+            mime=mime,
+            on_click="ignore",
+            key=f"{key}_download",
+        )
+
+
+# ---- Full-dataset exports ----
+
+def sheet1(excel_file=None):
+    return DataStore.load_sheet("Sheet1", excel_file)
+
+
+def project_actuals_forecast(excel_file=None):
+    """Actuals and Forecast per project and month, from the revenue cube."""
+    cube = RevenueCube.get_cube(excel_file, stale_ok=False)
+    totals = cube.groupby(["Project Name", "Month", "Metric"], observed=True, dropna=False)["Value"].sum()
+    return totals.unstack("Metric").reset_index().rename_axis(columns=None)
+
+
+DATASETS = {"sheet1": sheet1, "projects": project_actuals_forecast}
+
+
+def main(argv):
+    if len(argv) != 2 or argv[0] not in DATASETS:
+        print(f"usage: python DataExport.py {{{'|'.join(DATASETS)}}} OUTPUT.csv|OUTPUT.parquet")
+        return
+    dataset, output = argv
+    ext = os.path.splitext(output)[1].lstrip(".").lower()
+    if ext not in _WRITERS:
+        print(f"Unsupported output type '.{ext}' (expected .csv or .parquet)")
+        return
+    df = DATASETS[dataset]()
+    _WRITERS[ext](df, output)
+    print(f"Wrote {len(df)} rows to {output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,275 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import FactTable
+import Profiler
+import ProjectIndex
+import StorageBackend
+
+# Shared, process-wide access to the dashboard data.
+# Each sheet is read once from the storage backend (BaseDatasheet.xlsx by default, see
+# StorageBackend) and reused across reruns and sessions until the data version changes:
+# workbook mtime/size plus the AddingUser journal, or the MongoDB write counter.
+# Frames returned here are shared: treat them as read-only and .copy() before mutating.
+# excel_file=None means the configured backend; a path reads that workbook directly.
+# Derived artifacts (cube, summaries, indexes) can be precomputed off the request path by
+# a RefreshWorker, which publishes each refreshed set with publish_many.
+
+EXCEL_FILE = StorageBackend.EXCEL_FILE
+file_version = StorageBackend.file_version
+
+_lock = threading.Lock()
+_cache = {}
+_derived = {}
+_published = {}
+_refresher = None
+_stats = {"hits": 0, "misses": 0, "load_seconds": 0.0, "last_load_seconds": 0.0}
+
+
+def data_version(excel_file=None):
+    """Version of everything a read sees (workbook + pending journal, or Mongo write counter)."""
+    return StorageBackend.get_backend(excel_file).version()
+
+
+# Sheet1 schema: the dimensions pages group and filter on are categoricals, AssociateID is
+# text, and month measures are float32 wherever that holds every value exactly (whole
+# dollars do; amounts with cents that float32 can't represent stay float64).
+# Aggregations widen measures back to float64 before summing.
+SHEET1_REQUIRED = ["AssociateID", "Project Name", "ServiceLine", "Region"]
+SHEET1_CATEGORIES = ["Project Name", "ServiceLine", "Region", "PracticeLine"]
+
+
+def _compact_measure(values):
+    narrow = values.astype("float32")
+    exact = np.array_equal(narrow.to_numpy(dtype="float64"), values.to_numpy(), equal_nan=True)
+    return narrow if exact else values
+
+
+def _type_sheet1(df):
+    missing = [col for col in SHEET1_REQUIRED if col not in df.columns]
+    if missing:
+        raise ValueError(f"Sheet1 is missing required column(s): {', '.join(missing)}")
+    # AssociateID stays text (no "1,234" formatting, no "nan" strings)
+    df["AssociateID"] = df["AssociateID"].astype("string")
+    for col in SHEET1_CATEGORIES:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col, _, _ in FactTable.month_columns(df.columns):
+        df[col] = _compact_measure(pd.to_numeric(df[col], errors="coerce").astype("float64"))
+    return df
+
+
+_TYPERS = {
+    "Sheet1": _type_sheet1,
+}
+
+
+def _typed(sheet_name, df):
+    typer = _TYPERS.get(sheet_name)
+    return typer(df) if typer else df
+
+
+def load_sheet(sheet_name, excel_file=None):
+    """Return the typed DataFrame for a sheet, re-reading only when the data changed."""
+    backend = StorageBackend.get_backend(excel_file)
+    if sheet_name in StorageBackend.PRIVATE_SHEETS:
+        # never kept in the process cache (plaintext passwords)
+        return _typed(sheet_name, backend.read_sheet(sheet_name))
+    version = backend.version()
+    key = (backend.key, sheet_name)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _stats["hits"] += 1
+            return entry[1]
+
+        start = time.perf_counter()
+        with Profiler.stage("read"):
+            df = _typed(sheet_name, backend.read_sheet(sheet_name))
+        # the version read above, for optimistic write checks (PagedEditor, SheetWriter)
+        df.attrs["data_version"] = version
+        elapsed = time.perf_counter() - start
+
+        _stats["misses"] += 1
+        _stats["load_seconds"] += elapsed
+        _stats["last_load_seconds"] = elapsed
+        _cache[key] = (version, df)
+        return df
+
+
+def group_totals(sheet_name, dimensions, value_columns, excel_file=None):
+    """Summed value_columns per combination of dimensions, pushed down when the backend can."""
+    backend = StorageBackend.get_backend(excel_file)
+    if backend.pushdown:
+        return backend.group_totals(sheet_name, dimensions, value_columns)
+    df = load_sheet(sheet_name, excel_file)
+    # float32 measures are summed at full precision
+    values = df[list(value_columns)].astype("float64")
+    groups = [df[dim] for dim in dimensions]
+    return values.groupby(groups, dropna=False, sort=False, observed=True).sum().reset_index()
+
+
+def project_index(sheet_name="Sheet1", excel_file=None):
+    """Project Name -> row positions (ProjectIndex), built once per data version."""
+    return derived(
+        f"project_index:{sheet_name}",
+        lambda: ProjectIndex.ProjectIndex.build(load_sheet(sheet_name, excel_file)["Project Name"]),
+        excel_file,
+    )
+
+
+def fact_table(excel_file=None, stale_ok=True):
+    """Sheet1's month values in long form (FactTable), built once per data version."""
+    return derived(
+        "fact_table:Sheet1",
+        lambda: FactTable.FactTable.build(load_sheet("Sheet1", excel_file)),
+        excel_file, stale_ok,
+    )
+
+
+def query(sheet_name, where=None, columns=None, excel_file=None):
+    """Rows matching where ({column: value or [values]}) restricted to `columns`.
+
+    MongoDB filters and projects server-side; for the workbook, "Project Name" is
+    answered from the project index so only that project's rows are touched.
+    """
+    backend = StorageBackend.get_backend(excel_file)
+    if backend.pushdown:
+        with Profiler.stage("filter"):
+            return backend.find(sheet_name, where, columns)
+
+    df = load_sheet(sheet_name, excel_file)
+    with Profiler.stage("filter"):
+        positions = None
+        for col, value in (where or {}).items():
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            if col == "Project Name":
+                matched = project_index(sheet_name, excel_file).rows(values)
+            else:
+                matched = np.flatnonzero(df[col].isin(values).to_numpy())
+            positions = matched if positions is None else np.intersect1d(positions, matched)
+
+        rows = df if positions is None else df.iloc[np.sort(positions)]
+        return rows[list(columns)] if columns else rows
+
+
+def sheet_columns(sheet_name, excel_file=None):
+    backend = StorageBackend.get_backend(excel_file)
+    if backend.pushdown:
+        return backend.columns(sheet_name)
+    return list(load_sheet(sheet_name, excel_file).columns)
+
+
+def _stamped_as(name, other):
+    # "name@stamp" artifacts (RevenueCube.partitioned_name): the same name under another stamp
+    base, stamped, _ = name.rpartition("@")
+    return bool(stamped) and other != name and "@" in other and other.rpartition("@")[0] == base
+
+
+def _evict_stamps(entries, key):
+    # storing a stamped artifact drops its older stamps
+    backend_key, name = key
+    for other in list(entries):
+        if other[0] == backend_key and _stamped_as(name, other[1]):
+            entries.pop(other, None)
+
+
+def _store(key, version, value):
+    # same copy-and-swap as publish_many, so neither write can land in a replaced dict
+    global _derived
+    with _lock:
+        updated = dict(_derived)
+        updated[key] = (version, value)
+        _evict_stamps(updated, key)
+        _derived = updated
+
+
+def derived(name, build, excel_file=None, stale_ok=False):
+    """Memoize build() (an aggregate, index, ...) once per data version.
+
+    stale_ok: if a refresh worker is rebuilding this version, return the last published
+    value instead of building on the caller's thread.
+    """
+    backend = StorageBackend.get_backend(excel_file)
+    version = backend.version()
+    key = (backend.key, name)
+    entry = _derived.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    if stale_ok and entry is not None and _refresher is not None and _refresher.serves(backend, version):
+        _refresher.kick()
+        return entry[1]
+    with Profiler.stage("aggregate"):
+        value = build()
+    _store(key, version, value)
+    return value
+
+
+def latest(name, excel_file=None):
+    """The value last stored for `name` under any data version or partition stamp, or None."""
+    backend = StorageBackend.get_backend(excel_file)
+    entries = list(_derived.items())
+    for (key, other), (_, value) in entries:
+        if key == backend.key and other == name:
+            return value
+    for (key, other), (_, value) in entries:
+        if key == backend.key and _stamped_as(name, other):
+            return value
+    return None
+
+
+def publish(name, value, excel_file=None):
+    """Register an artifact that was updated in place as current for the new data version."""
+    backend = StorageBackend.get_backend(excel_file)
+    _store((backend.key, name), backend.version(), value)
+
+
+def publish_many(values, version, excel_file=None):
+    """Make a refreshed set of artifacts current for `version` in one swap (readers see all or none)."""
+    global _derived
+    backend = StorageBackend.get_backend(excel_file)
+    with _lock:
+        updated = dict(_derived)
+        updated.update({(backend.key, name): (version, value) for name, value in values.items()})
+        for name in values:
+            _evict_stamps(updated, (backend.key, name))
+        _derived = updated
+        _published[backend.key] = version
+
+
+def set_refresher(refresher):
+    """Route stale_ok reads through `refresher` (see RefreshWorker); None builds inline again."""
+    global _refresher
+    _refresher = refresher
+
+
+def view_version(excel_file=None):
+    """Data version that stale_ok artifacts reflect: the last published refresh while a
+    refresh worker serves stale reads, otherwise the live version."""
+    backend = StorageBackend.get_backend(excel_file)
+    version = backend.version()
+    published = _published.get(backend.key)
+    if published is None or _refresher is None or not _refresher.serves(backend, version):
+        return version
+    return published
+
+
+def cache_stats():
+    """Hits, misses and cumulative/last load time (seconds) since process start."""
+    with _lock:
+        stats = dict(_stats)
+        stats["cached_sheets"] = sorted(sheet for _, sheet in _cache)
+    stats["backend"] = StorageBackend.get_backend().name
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _derived.clear()
+        _published.clear()
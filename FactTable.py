@@ -0,0 +1,147 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Canonical month dimension and the long-format month facts of Sheet1.
+# Sheet1 keeps one column per month and metric ("Jan Actuals", "March Forecast", the odd
+# "JulyForecast"); each header is parsed once here into a calendar Month (ordered
+# categorical, full names as in Sheet3) and a Metric. FactTable holds one row per
+# (Sheet1 row, month, metric) with a value, stored in (Metric, Month) blocks sorted by
+# project, so a month/metric/project selection is a set of known row ranges instead of a
+# melt, a header scan or a mask over every row.
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+MONTH_DTYPE = pd.CategoricalDtype(MONTHS, ordered=True)
+QUARTERS = {month: f"Q{i // 3 + 1}" for i, month in enumerate(MONTHS)}
+
+METRICS = ["Actuals", "Forecast"]
+METRIC_DTYPE = pd.CategoricalDtype(METRICS)
+
+# Sheet1 columns carried onto every fact row (as categoricals)
+DIMENSIONS = ["Project Name", "AssociateID", "ServiceLine", "Region"]
+
+_BY_PREFIX = {month[:3].lower(): month for month in MONTHS}
+_MONTH_COLUMN = re.compile(r"^\s*(?P<month>[A-Za-z]+?)\s*(?P<metric>Actuals|Forecast)\s*$")
+
+
+def canonical_month(name):
+    """"Jan", "january", "Sept" -> "January", "January", "September"; None if not a month."""
+    text = str(name).strip().lower()
+    month = _BY_PREFIX.get(text[:3])
+    return month if month is not None and month.lower().startswith(text) else None
+
+
+def month_categorical(values):
+    """values as the canonical Month dimension (NaN where a value isn't a month)."""
+    return pd.Categorical(pd.Series(values).map(canonical_month), dtype=MONTH_DTYPE)
+
+
+def month_columns(columns):
+    """[(column, month, metric)] for every "<Month> Actuals/Forecast" column, in sheet order."""
+    found = []
+    for col in columns:
+        match = _MONTH_COLUMN.match(str(col))
+        month = canonical_month(match.group("month")) if match else None
+        if month is not None:
+            found.append((col, month, match.group("metric")))
+    return found
+
+
+def _categorical(values, positions):
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    return values.array.take(positions)
+
+
+class FactTable:
+    def __init__(self, frame, blocks):
+        self.frame = frame
+        self._blocks = blocks  # {(metric, month): (start, stop)} row range in frame
+        self._projects = frame["Project Name"].array
+        self._project_codes = self._projects.codes  # ascending within each block
+        self._values = frame["Value"].to_numpy()
+
+    @classmethod
+    def build(cls, sheet1):
+        """Facts for every non-blank month value of a typed Sheet1 frame."""
+        parsed = sorted(month_columns(sheet1.columns), key=lambda p: (METRICS.index(p[2]), MONTHS.index(p[1])))
+        values = sheet1[[col for col, _, _ in parsed]].to_numpy(dtype="float64").T
+        present = ~np.isnan(values)
+        block, row = np.nonzero(present)
+        project_codes = _categorical(sheet1["Project Name"], np.arange(len(sheet1))).codes
+        # repeated headers for one (Metric, Month) ("Jul Forecast", "JulyForecast") share a block
+        keys = [(metric, month) for _, month, metric in parsed]
+        merged = np.cumsum([i > 0 and key != keys[i - 1] for i, key in enumerate(keys)], dtype=np.intp)
+        # within a block: by project, then sheet order
+        order = np.lexsort((row, project_codes[row], merged[block]))
+        block, row = block[order], row[order]
+
+        # Blocks follow (Metric, Month) order
+        blocks = {}
+        stop = 0
+        for (_, month, metric), count in zip(parsed, present.sum(axis=1)):
+            start = blocks.get((metric, month), (stop, stop))[0]
+            stop += int(count)
+            blocks[(metric, month)] = (start, stop)
+
+        month_codes = np.array([MONTHS.index(month) for _, month, _ in parsed], dtype=np.int8)
+        metric_codes = np.array([METRICS.index(metric) for _, _, metric in parsed], dtype=np.int8)
+        frame = pd.DataFrame({dim: _categorical(sheet1[dim], row) for dim in DIMENSIONS if dim in sheet1.columns})
+        frame["Month"] = pd.Categorical.from_codes(month_codes[block], dtype=MONTH_DTYPE)
+        frame["Metric"] = pd.Categorical.from_codes(metric_codes[block], dtype=METRIC_DTYPE)
+        frame["Value"] = values[present][order]
+        frame["Row"] = row  # position in Sheet1
+        return cls(frame, blocks)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def months(self, metric="Actuals"):
+        """Months with a `metric` column in Sheet1, in calendar order."""
+        return [month for m, month in self._blocks if m == metric]
+
+    def _ranges(self, months, metrics, projects):
+        # [((metric, month), start, stop)]: whole blocks, narrowed to the projects' runs
+        if isinstance(metrics, str):
+            metrics = [metrics]
+        wanted = None if months is None else {canonical_month(m) for m in months}
+        ranges = [
+            (key, start, stop) for key, (start, stop) in self._blocks.items()
+            if key[0] in metrics and (wanted is None or key[1] in wanted)
+        ]
+        if projects is None:
+            return ranges
+        codes = np.unique(self._projects.categories.get_indexer(list(projects)))
+        codes = codes[codes >= 0]
+        narrowed = []
+        for key, start, stop in ranges:
+            block_codes = self._project_codes[start:stop]
+            lows = np.searchsorted(block_codes, codes, side="left")
+            highs = np.searchsorted(block_codes, codes, side="right")
+            narrowed.extend((key, start + lo, start + hi) for lo, hi in zip(lows, highs) if hi > lo)
+        return narrowed
+
+    def select(self, months=None, metrics=METRICS, projects=None):
+        """Fact rows for the given months ("Jan" or "January"; None = all), metrics and projects."""
+        ranges = self._ranges(months, metrics, projects)
+        positions = np.concatenate([np.arange(start, stop) for _, start, stop in ranges]) if ranges else []
+        return self.frame.iloc[positions]
+
+    def totals(self, by, months=None, metrics=METRICS, projects=None):
+        """Summed Value per `by` (column or list), over the selected facts."""
+        by = [by] if isinstance(by, str) else list(by)
+        if not set(by) <= {"Month", "Metric"}:
+            rows = self.select(months, metrics, projects)
+            return rows.groupby(by, observed=True)["Value"].sum().reset_index()
+        # Month/Metric totals are sums of whole ranges; no fact rows are materialized
+        sums = {}
+        for (metric, month), start, stop in self._ranges(months, metrics, projects):
+            sums[(metric, month)] = sums.get((metric, month), 0.0) + self._values[start:stop].sum()
+        keyed = pd.DataFrame(
+            [(month, metric, value) for (metric, month), value in sums.items()], columns=["Month", "Metric", "Value"]
+        ).astype({"Month": MONTH_DTYPE, "Metric": METRIC_DTYPE})
+        return keyed.groupby(by, observed=True)["Value"].sum().reset_index()
@@ -0,0 +1,120 @@
+import pandas as pd
+import streamlit as st
+import altair as alt
+import plotly.graph_objects as go
+
+import Analytics
+import ChartCache
+import RevenueCube
+
+
+def _bar_chart(df, dimension, scheme, title):
+    bar_base = alt.Chart(df).encode(
+        y=alt.Y(f"{dimension}:N", sort="-x"),
+        x=alt.X("Actuals_YTD:Q", axis=alt.Axis(format="$,.0f"))
+    )
+    bars = bar_base.mark_bar(size=25, cornerRadiusTopLeft=4, cornerRadiusTopRight=4).encode(
+        color=alt.Color(f"{dimension}:N", scale=alt.Scale(scheme=scheme), legend=None)
+    )
+    labels = bar_base.mark_text(align="left", baseline="middle", dx=5, fontSize=13, color="white").encode(
+        text="RevenueLabel:N"
+    )
+    return (bars + labels).properties(title=title, height=280).configure_title(
+        fontSize=20, fontWeight="bold", color="#1f77b4", anchor="start", font="Segoe UI"
+    ).configure_view(stroke=None)
+
+
+def _pie_chart(df, dimension, title):
+    fig = go.Figure(data=[go.Pie(
+        labels=df[dimension],
+        values=df["Actuals_YTD"],
+        textinfo="percent",
+        textposition="outside",
+        hole=0.3
+    )])
+    fig.update_traces(marker=dict(line=dict(color="#000000", width=1)))
+    fig.update_layout(title_text=title, title_font_size=16)
+    return fig
+
+
+def show_page():
+    st.title("🏠 Welcome to the Dashboard")
+    st.markdown("---")
+
+    # 🔹 Monthly metrics for all projects (analytics engine, built once per data version)
+    totals = Analytics.project_metrics().combined()
+    latest_month = totals.latest_month()
+    latest = totals.at(latest_month) if latest_month else None
+
+    # ✅ Handle missing 'Active' column gracefully
+    #if "Active" in df.columns:
+    #    df = df[df["Active"].astype(str).str.lower() == "yes"]
+    #else:
+    #   st.warning("⚠️ 'Active' column not found — showing all records.")
+
+    # 🎯 YTD Revenue (cumulative through the latest month with actuals)
+    total_revenue = latest["YTD"] if latest is not None else 0.0
+
+    st.markdown(
+        f"<h3 style='color:#1f77b4; font-weight:bold; text-align:center;'>Total YTD Revenue: <b>${total_revenue:,.0f}</b></h3>",
+        unsafe_allow_html=True
+    )
+
+    if latest is not None:
+        m1, m2, m3 = st.columns(3)
+        m1.metric(
+            f"📆 {latest_month} Actuals", f"${latest['Value']:,.0f}",
+            delta=None if pd.isna(latest["MoM %"]) else f"{latest['MoM %']:+.1f}% MoM"
+        )
+        m2.metric(f"〰️ {Analytics.ROLLING} Average", "–" if pd.isna(latest[Analytics.ROLLING]) else f"${latest[Analytics.ROLLING]:,.0f}")
+        m3.metric(
+            f"📅 vs {latest_month} {Analytics.LIVE_YEAR - 1}", "–" if pd.isna(latest["YoY"]) else f"{latest['YoY']:+,.0f}",
+            delta=None if pd.isna(latest["YoY %"]) else f"{latest['YoY %']:+.1f}% YoY"
+        )
+
+    # === Bar Charts Side by Side ===
+    col1, col2 = st.columns(2)
+
+    # 📊 Revenue by Service Line
+    summary_df = RevenueCube.ytd_summary("ServiceLine")
+
+    with col1:
+        ChartCache.altair_chart(
+            "Home", "service_line_bars", {},
+            lambda: _bar_chart(summary_df, "ServiceLine", "pastel1", "💰 YTD Revenue by Service Line"),
+            use_container_width=True
+        )
+    with st.expander("📄 View Service Line Table"):
+        st.dataframe(summary_df.sort_values("Actuals_YTD", ascending=False), use_container_width=True)
+
+    # 📊 Revenue by Region
+    region_df = RevenueCube.ytd_summary("Region")
+
+    with col2:
+        ChartCache.altair_chart(
+            "Home", "region_bars", {},
+            lambda: _bar_chart(region_df, "Region", "pastel2", "🌐 YTD Revenue by Region"),
+            use_container_width=True
+        )
+    with st.expander("📄 View Region Table"):
+        st.dataframe(region_df.sort_values("Actuals_YTD", ascending=False), use_container_width=True)
+
+    # === 🥧 3D-Style Pie Charts Using Plotly ===
+    st.markdown("---")
+    pie_col1, pie_col2 = st.columns(2)
+
+    with pie_col1:
+        st.markdown("### 🥧 Revenue Contribution by Service Line")
+        ChartCache.plotly_chart(
+            "Home", "service_line_pie", {},
+            lambda: _pie_chart(summary_df, "ServiceLine", "Service Line Contribution"),
+            use_container_width=True
+        )
+
+    with pie_col2:
+        st.markdown("### 🥧 Revenue Contribution by Region")
+        ChartCache.plotly_chart(
+            "Home", "region_pie", {},
+            lambda: _pie_chart(region_df, "Region", "Region Contribution"),
+            use_container_width=True
+        )
@@ -0,0 +1,284 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import WriteCoordinator
+
+try:
+    import fcntl
+except ImportError:  # Windows: a journal still open for append can't be renamed, so claim() waits for the next pass
+    fcntl = None
+
+# Append-only write-ahead log for new rows (AddingUser submissions, bulk imports).
+# A submission is one O_APPEND write of a JSON line next to the workbook (a bulk import
+# batch is one line holding all of its rows, so it lands whole or not at all); the
+# compactor later folds every pending line into BaseDatasheet.xlsx with a single
+# load/save. DataStore merges pending lines into reads so new rows show up at once.
+#
+# Compaction first renames the journal to a ".compacting" file, so new submissions
+# keep going to a fresh journal. Appends hold a shared lock on "<journal>.lock" and the
+# rename an exclusive one, so no write can land in a file after it was claimed. A crash
+# mid-compaction leaves that file behind; it is still read as pending and picked up by
+# the next compaction. The ids of the entries a save folded in are stored with it (hidden
+# APPLIED_SHEET), so a crash between the save and deleting the claimed files never
+# applies an entry twice.
+
+COMPACT_INTERVAL_S = 60
+APPLIED_SHEET = "_journal"
+APPLIED_COLUMN = "EntryID"
+
+logger = logging.getLogger(__name__)
+
+_compactors = {}  # workbook path -> compactor thread
+_compactors_lock = threading.Lock()
+_compaction_errors = {}  # workbook path -> last compaction error, cleared by a successful pass
+
+
+def journal_path(excel_file):
+    stem = os.path.splitext(os.path.abspath(excel_file))[0]
+    return f"{stem}.journal.jsonl"
+
+
+def _claim_time(path):
+    # "<stem>.journal.<pid>-<time_ns>.compacting" -> time_ns, so claims replay in claim order
+    return int(path.rsplit(".", 2)[-2].rsplit("-", 1)[-1])
+
+
+def _claimed_paths(excel_file):
+    stem = os.path.splitext(os.path.abspath(excel_file))[0]
+    return sorted(glob.glob(f"{glob.escape(stem)}.journal.*.compacting"), key=_claim_time)
+
+
+def has_claims(excel_file):
+    """True while claimed files exist (a compaction running, or one that crashed)."""
+    return bool(_claimed_paths(excel_file))
+
+
+@contextmanager
+def _journal_lock(excel_file, exclusive):
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(f"{journal_path(excel_file)}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+def _pending_paths(excel_file):
+    paths = _claimed_paths(excel_file)
+    if os.path.exists(journal_path(excel_file)):
+        paths.append(journal_path(excel_file))
+    return paths
+
+
+def _write_entry(entry, excel_file):
+    line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+    # shared: appends run side by side, but never while claim() renames the journal
+    with _journal_lock(excel_file, exclusive=False):
+        fd = os.open(journal_path(excel_file), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(line)
+            while view:  # a large batch line may take more than one write call
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return entry["id"]
+
+
+def _new_entry(sheet_name):
+    return {
+        "id": uuid.uuid4().hex,
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "sheet": sheet_name,
+    }
+
+
+def append(row, sheet_name="Sheet1", excel_file="BaseDatasheet.xlsx"):
+    """Record one new row. O(1): a single appended line, no workbook I/O."""
+    entry = _new_entry(sheet_name)
+    entry["row"] = row
+    return _write_entry(entry, excel_file)
+
+
+def append_many(rows, sheet_name="Sheet1", excel_file="BaseDatasheet.xlsx"):
+    """Record a batch of new rows as one line: one write and one fsync for the whole batch."""
+    entry = _new_entry(sheet_name)
+    entry["rows"] = list(rows)
+    return _write_entry(entry, excel_file)
+
+
+def entry_rows(entry):
+    """The rows of a journal entry (one for a submission, many for a batch)."""
+    return entry["rows"] if "rows" in entry else [entry["row"]]
+
+
+def read_entries(paths):
+    entries = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # torn trailing line from an interrupted write
+                        continue
+        except FileNotFoundError:
+            continue
+    return entries
+
+
+def version(excel_file):
+    """Cheap stamp of the pending journal files, for cache keys."""
+    stamp = []
+    for path in _pending_paths(excel_file):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamp.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def pending_rows(sheet_name, excel_file, applied=()):
+    """Rows submitted for a sheet that are not in the workbook yet (`applied`: entry ids it already holds)."""
+    return [
+        row for entry in read_entries(_pending_paths(excel_file))
+        if entry.get("sheet") == sheet_name and entry.get("id") not in applied
+        for row in entry_rows(entry)
+    ]
+
+
+def pending_count(excel_file):
+    return sum(len(entry_rows(entry)) for entry in read_entries(_pending_paths(excel_file)))
+
+
+def claim(excel_file):
+    """Move the live journal aside and return every file awaiting compaction."""
+    live = journal_path(excel_file)
+    if os.path.exists(live):
+        stem = os.path.splitext(live)[0]
+        # exclusive: waits for appends that already opened the live journal
+        with _journal_lock(excel_file, exclusive=True):
+            try:
+                os.replace(live, f"{stem}.{os.getpid()}-{time.time_ns()}.compacting")
+            except (FileNotFoundError, PermissionError):
+                # gone already, or (Windows) still open for an append: claimed next time
+                pass
+    return _claimed_paths(excel_file)
+
+
+def release(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def applied_ids(wb):
+    """Ids of the journal entries recorded in the workbook by the last apply()."""
+    if APPLIED_SHEET not in wb.sheetnames:
+        return set()
+    return {value for (value,) in wb[APPLIED_SHEET].iter_rows(min_row=2, max_col=1, values_only=True) if value}
+
+
+def _record_applied(wb, ids):
+    # only entries still in claimed files matter, so the record is replaced, not grown
+    if APPLIED_SHEET in wb.sheetnames:
+        del wb[APPLIED_SHEET]
+    ws = wb.create_sheet(APPLIED_SHEET)
+    ws.sheet_state = "hidden"
+    ws.append([APPLIED_COLUMN])
+    for entry_id in ids:
+        ws.append([entry_id])
+
+
+def apply(wb, entries):
+    """Append journal entries to their sheets, aligning values by header name.
+
+    Entries the workbook already records as applied are skipped; all of `entries` are
+    recorded for the save that follows. Returns the entries appended.
+    """
+    done = applied_ids(wb)
+    fresh = [entry for entry in entries if entry.get("id") not in done]
+    for entry in fresh:
+        sheet_name = entry.get("sheet", "Sheet1")
+        if sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+        elif len(wb.sheetnames) == 1 and wb.active.max_row == 1 and wb.active["A1"].value is None:
+            ws = wb.active
+            ws.title = sheet_name
+        else:
+            ws = wb.create_sheet(sheet_name)
+
+        header = [cell.value for cell in ws[1]] if ws.max_row >= 1 and ws["A1"].value is not None else []
+        for row in entry_rows(entry):
+            for col in row:
+                if col not in header:
+                    header.append(col)
+                    ws.cell(row=1, column=len(header)).value = col
+            ws.append([row.get(col) for col in header])
+    _record_applied(wb, [entry["id"] for entry in entries if entry.get("id")])
+    return fresh
+
+
+def compact(excel_file="BaseDatasheet.xlsx"):
+    """Fold all pending journal entries into the workbook with one load and one save."""
+    with WriteCoordinator.workbook_lock(excel_file):
+        paths = claim(excel_file)
+        entries = read_entries(paths)
+        if not entries:
+            release(paths)
+            return 0
+
+        # openpyxl is only needed here; the AddingUser append path never imports it
+        from openpyxl import Workbook, load_workbook
+
+        wb = load_workbook(excel_file) if os.path.exists(excel_file) else Workbook()
+        applied = apply(wb, entries)
+        WriteCoordinator.save_workbook(wb, excel_file)
+        release(paths)
+        return sum(len(entry_rows(entry)) for entry in applied)
+
+
+def compaction_error(excel_file="BaseDatasheet.xlsx"):
+    """The background compactor's last error for this workbook, or None."""
+    return _compaction_errors.get(os.path.abspath(excel_file))
+
+
+def start_compactor(excel_file="BaseDatasheet.xlsx", interval=COMPACT_INTERVAL_S):
+    """Start (once per workbook and process) a daemon thread that compacts its journal periodically."""
+    path = os.path.abspath(excel_file)
+    with _compactors_lock:
+        thread = _compactors.get(path)
+        if thread is not None and thread.is_alive():
+            return thread
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                try:
+                    compact(excel_file)
+                    _compaction_errors.pop(path, None)
+                except Exception as e:  # keep the worker alive; next tick retries
+                    _compaction_errors[path] = f"{type(e).__name__}: {e}"
+                    logger.exception("Journal compaction failed for %s", excel_file)
+
+        thread = threading.Thread(target=_run, name=f"journal-compactor:{os.path.basename(path)}", daemon=True)
+        _compactors[path] = thread
+        thread.start()
+        return thread
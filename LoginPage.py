@@ -0,0 +1,20 @@
+import streamlit as st
+
+import AuthService
+
+
+def show_page():
+    st.title("🔐 Sign in")
+    st.caption("Use your employee ID and password from the Authenticate sheet.")
+
+    with st.form("login_form"):
+        emp_id = st.text_input("Employee ID")
+        password = st.text_input("Password", type="password")
+        submitted = st.form_submit_button("Sign in")
+
+    if submitted:
+        role = AuthService.login(st.session_state, emp_id, password)
+        if role is None:
+            st.error("Invalid employee ID or password.")
+        else:
+            st.rerun()
@@ -0,0 +1,76 @@
+import importlib
+import time
+
+import streamlit as st
+
+import AuthService
+import Profiler
+
+# Sidebar label -> page module (each exposes show_page()).
+# Modules are imported on first selection only, so a session pays for altair/plotly and
+# the page's own imports only when it actually opens a page that needs them.
+
+PAGES = {
+    "Home": "HomePage",
+    "Add User": "AddingUser",
+    "Bulk Import": "BulkImportPage",
+    "Actuals Vs Forecast": "ActualsVsForecast",
+    "Update Actuals": "UpdatingActualsWithFilter",
+    "Actuals By Month": "ActualsByMonth",
+    "Actuals By Year": "ActualsByYear",
+    "Revenue Trend by Year": "MonthByYear",
+    "Settings": "SettingsPage",
+}
+
+# lowest AuthService role that may open a page; pages not listed are open to every role
+MIN_ROLE = {
+    "Add User": "Contributor",
+    "Bulk Import": "Contributor",
+    "Update Actuals": "Contributor",
+    "Settings": "Admin",
+}
+
+# seconds spent importing each page module (first load in this process)
+load_times = {}
+
+
+def load_page(label):
+    """The page module for `label`, or None when its module does not exist."""
+    module_name = PAGES[label]
+    start = time.perf_counter()
+    try:
+        with Profiler.stage("import"):
+            module = importlib.import_module(module_name)
+    except ModuleNotFoundError as exc:
+        # only a missing page module is tolerated; a missing dependency inside it still raises
+        if exc.name != module_name:
+            raise
+        return None
+    load_times.setdefault(module_name, time.perf_counter() - start)
+    return module
+
+
+def pages_for(role):
+    """Sidebar labels `role` may open, in PAGES order."""
+    rank = AuthService.role_rank(role)
+    return [label for label in PAGES if rank >= AuthService.role_rank(MIN_ROLE.get(label, AuthService.ROLES[0]))]
+
+
+def _render(label):
+    module = load_page(label)
+    if module is None or not hasattr(module, "show_page"):
+        st.title(label)
+        st.error(f"🚧 This page is not available (page module '{PAGES[label]}' not found).")
+        return
+    module.show_page()
+
+
+def show(label):
+    """Render the page; with profiling on (Settings), time its stages and show them in the sidebar."""
+    if not st.session_state.get("profiling"):
+        _render(label)
+        return
+    # a capture requested on the Settings page applies to the next rerun only
+    with Profiler.run(label, st.session_state.pop("profile_capture", None)) as result:
+        _render(label)
+    Profiler.sidebar_overlay(result)
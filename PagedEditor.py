@@ -0,0 +1,107 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+import DataStore
+import Profiler
+import SheetWriter
+
+# Windowed st.data_editor for large sheets.
+# Only the visible page is serialized to the browser. Edits are diffed against the
+# original rows and kept in a session-side change buffer ({row label: {column: value}}),
+# so they survive paging and filtering; saving commits just that buffer.
+# The data version and original value of every edited cell are recorded on first edit,
+# so a save made against data someone else has changed since is caught as a conflict.
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def _buffer(key):
+    return st.session_state.setdefault(f"{key}_changes", {})
+
+
+def _base(key):
+    return st.session_state.setdefault(f"{key}_base", {})
+
+
+def _editable(rows):
+    # Copy the editor can take any value into: categorical dimensions as plain values
+    # (free text, not a dropdown of existing names) and float32 measures as float64.
+    widen = {}
+    for col, dtype in rows.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            widen[col] = object
+        elif dtype == "float32":
+            widen[col] = "float64"
+    return rows.astype(widen)
+
+
+def paged_data_editor(df, key, page_sizes=PAGE_SIZES):
+    """Render one page of df for editing and return the session's change buffer."""
+    changes = _buffer(key)
+
+    nav1, nav2, nav3 = st.columns([1, 1, 2])
+    page_size = nav1.selectbox("Rows per page", page_sizes, index=1, key=f"{key}_page_size")
+    total_pages = max(1, math.ceil(len(df) / page_size))
+    page = nav2.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=f"{key}_page")
+    start = (page - 1) * page_size
+    nav3.caption(f"Rows {min(start + 1, len(df))}–{min(start + page_size, len(df))} of {len(df)} · page {page}/{total_pages}")
+
+    window = _editable(df.iloc[start:start + page_size])
+
+    # Show buffered edits for rows on this page
+    shown = window.copy()
+    for label in shown.index.intersection(list(changes)):
+        for col, value in changes[label].items():
+            shown.at[label, col] = value
+
+    with Profiler.stage("data_editor"):
+        edited = st.data_editor(shown, num_rows="fixed", use_container_width=True, key=f"{key}_editor_{page_size}_{page}")
+
+    # Re-diff this page against the original rows; untouched or reverted rows drop out
+    page_changes = SheetWriter.diff_rows(window, edited)
+    base = _base(key)
+    if page_changes and not changes:
+        st.session_state[f"{key}_version"] = df.attrs.get("data_version", DataStore.data_version())
+    for label in window.index:
+        if label in page_changes:
+            changes[label] = page_changes[label]
+            originals = base.setdefault(label, {})
+            for col in page_changes[label]:
+                originals.setdefault(col, window.at[label, col])
+        else:
+            changes.pop(label, None)
+            base.pop(label, None)
+    return changes
+
+
+def changed_rows(df, key):
+    """Original rows with the buffered edits applied (only rows that have edits)."""
+    changes = _buffer(key)
+    labels = df.index.intersection(list(changes))
+    edited = _editable(df.loc[labels])
+    for label in labels:
+        for col, value in changes[label].items():
+            edited.at[label, col] = value
+    return edited
+
+
+def pending_count(key):
+    return sum(len(cols) for cols in _buffer(key).values())
+
+
+def base_version(key):
+    """Data version the buffered edits were made against (None when nothing is buffered)."""
+    return st.session_state.get(f"{key}_version") if _buffer(key) else None
+
+
+def base_values(key):
+    """Original value of every buffered cell, {label: {column: value}}."""
+    return _base(key)
+
+
+def clear(key):
+    st.session_state[f"{key}_changes"] = {}
+    st.session_state[f"{key}_base"] = {}
+    st.session_state.pop(f"{key}_version", None)
@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow.feather as feather  # ships with streamlit
+
+import DataStore
+import FactTable
+import WriteCoordinator
+
+# Partitioned multi-year, multi-scenario revenue facts.
+# One Feather file per (year, scenario) under partitions/<year>/<scenario>.feather next to
+# the workbook, holding that year's project-level month facts (FactTable rows: Project
+# Name, AssociateID, ServiceLine, Region, Month, Value). The live workbook stays the
+# current year; closed years and forecast versions are imported here instead of widening
+# Sheet1. A partition is only read when a query needs it, and its project x month totals
+# are cached per partition until that one file changes.
+#
+#   python PartitionStore.py import BaseDatasheet_2024.xlsx 2024 [--scenario "Forecast v2"]
+#   python PartitionStore.py list
+
+PARTITION_DIR = "partitions"
+MAX_LOADED = 8
+COLUMNS = FactTable.DIMENSIONS + ["Month", "Value"]
+
+_lock = threading.Lock()
+_frames = OrderedDict()  # path -> (file version, facts), LRU of loaded partitions
+_totals = {}             # path -> (file version, project x month totals)
+
+
+def _root(excel_file=None):
+    return os.path.join(os.path.dirname(os.path.abspath(excel_file or DataStore.EXCEL_FILE)), PARTITION_DIR)
+
+
+def _file_name(scenario):
+    return re.sub(r"[^A-Za-z0-9 ._-]", "_", str(scenario)).strip() or "_"
+
+
+def partition_path(year, scenario, excel_file=None):
+    return os.path.join(_root(excel_file), str(int(year)), f"{_file_name(scenario)}.feather")
+
+
+def _listing(excel_file=None):
+    # [(year, scenario, path, file version)], from directory entries only
+    found = []
+    root = _root(excel_file)
+    if not os.path.isdir(root):
+        return found
+    for year_dir in os.scandir(root):
+        if not (year_dir.is_dir() and year_dir.name.isdigit()):
+            continue
+        for entry in os.scandir(year_dir.path):
+            if entry.name.endswith(".feather"):
+                stat = entry.stat()
+                version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+                found.append((int(year_dir.name), entry.name[:-len(".feather")], entry.path, version))
+    return sorted(found)
+
+
+def partitions(excel_file=None):
+    """[(year, scenario)] stored on disk, without reading any of them."""
+    return [(year, scenario) for year, scenario, _, _ in _listing(excel_file)]
+
+
+def version(excel_file=None):
+    """Short stamp of the partition set; changes when a partition is added, replaced or removed."""
+    listing = [(year, scenario, stamp) for year, scenario, _, stamp in _listing(excel_file)]
+    return hashlib.sha1(repr(listing).encode()).hexdigest()[:12]
+
+
+def load(year, scenario="Actuals", excel_file=None):
+    """Facts of one partition, read on first use and kept until its file changes."""
+    path = partition_path(year, scenario, excel_file)
+    stamp = WriteCoordinator.file_version(path)  # FileNotFoundError: no such partition
+    with _lock:
+        entry = _frames.get(path)
+        if entry is not None and entry[0] == stamp:
+            _frames.move_to_end(path)
+            return entry[1]
+        facts = feather.read_feather(path, memory_map=True)
+        _frames[path] = (stamp, facts)
+        while len(_frames) > MAX_LOADED:
+            _frames.popitem(last=False)
+        return facts
+
+
+def project_month_totals(year, scenario="Actuals", excel_file=None):
+    """Value per (Project Name, Month) of one partition, cached until that partition changes."""
+    path = partition_path(year, scenario, excel_file)
+    stamp = WriteCoordinator.file_version(path)
+    entry = _totals.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    facts = load(year, scenario, excel_file)
+    totals = facts.groupby(["Project Name", "Month"], observed=True)["Value"].sum().reset_index()
+    _totals[path] = (stamp, totals)
+    return totals
+
+
+def project_totals(year, months=None, scenario="Actuals", excel_file=None):
+    """Project Name, Value for one year and scenario over the selected months, largest first."""
+    totals = project_month_totals(year, scenario, excel_file)
+    if months is not None:
+        totals = totals[totals["Month"].isin([FactTable.canonical_month(m) for m in months])]
+    by_project = totals.groupby("Project Name", observed=True)["Value"].sum()
+    return by_project.sort_values(ascending=False).reset_index()
+
+
+def year_totals(scenario="Actuals", excel_file=None):
+    """Month, Year, Revenue for every year with a `scenario` partition (the shape of melted Sheet3)."""
+    frames = []
+    for year, name, _, _ in _listing(excel_file):
+        if name != _file_name(scenario):
+            continue
+        monthly = project_month_totals(year, scenario, excel_file).groupby("Month", observed=True)["Value"].sum()
+        frames.append(pd.DataFrame({"Month": monthly.index, "Year": year, "Revenue": monthly.to_numpy()}))
+    if not frames:
+        return pd.DataFrame({
+            "Month": pd.Categorical([], dtype=FactTable.MONTH_DTYPE),
+            "Year": pd.Series([], dtype="int64"),
+            "Revenue": pd.Series([], dtype="float64"),
+        })
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---- Writing partitions ----
+
+def write_partition(facts, year, scenario, excel_file=None):
+    """Store FactTable rows as the (year, scenario) partition, replacing it atomically."""
+    path = partition_path(year, scenario, excel_file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = [col for col in COLUMNS if col in facts.columns]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(facts[columns].reset_index(drop=True), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    return path
+
+
+def import_workbook(source, year, forecast_scenario="Forecast", excel_file=None):
+    """Split a one-year workbook's Sheet1 into (year, "Actuals") and (year, forecast_scenario).
+
+    Returns {scenario: (path, fact rows)}.
+    """
+    facts = FactTable.FactTable.build(DataStore.load_sheet("Sheet1", source))
+    written = {}
+    for metric, scenario in (("Actuals", "Actuals"), ("Forecast", forecast_scenario)):
+        rows = facts.select(metrics=metric)
+        written[scenario] = (write_partition(rows, year, scenario, excel_file), len(rows))
+    return written
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Per-year / per-scenario revenue partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="store a one-year workbook's Sheet1 as partitions")
+    importer.add_argument("workbook")
+    importer.add_argument("year", type=int)
+    importer.add_argument("--scenario", default="Forecast", help="scenario name for its Forecast columns")
+    commands.add_parser("list", help="show the stored partitions")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        for scenario, (path, rows) in import_workbook(args.workbook, args.year, args.scenario).items():
+            print(f"{args.year} {scenario}: {rows} fact rows -> {path}")
+    else:
+        for year, scenario, path, _ in _listing():
+            print(f"{year} {scenario}: {os.path.getsize(path) / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,162 @@
+import cProfile
+import glob
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Per-rerun stage timings for the dashboard pages.
+# PageRegistry.show runs a page inside run() when profiling is switched on (Settings);
+# while that rerun is active on the script thread, stage() blocks in the hot paths
+# (sheet reads, derived builds, queries, chart builds and draws, data_editor, exports)
+# add their wall time to its breakdown. Stage times are exclusive: a sheet read inside an
+# aggregate build counts as "read", not twice. Anything outside a stage is "page code".
+# With no active rerun (profiling off, CLI, the refresh worker) stage() does nothing.
+#
+# Rolling p50/p95 per page and stage cover the last WINDOW profiled reruns in this process.
+# A single rerun can also be captured with cProfile (.prof, for pstats/snakeviz) or
+# tracemalloc (.tracemalloc, tracemalloc.Snapshot.load) into .profiles/.
+
+PROFILE_DIR = ".profiles"
+WINDOW = 200
+KEEP_DUMPS = 20
+CAPTURES = {"cprofile": "prof", "tracemalloc": "tracemalloc"}
+OTHER = "page code"
+
+_local = threading.local()
+_lock = threading.Lock()
+_history = defaultdict(lambda: deque(maxlen=WINDOW))  # page -> [{stage: seconds, "total": s}]
+
+
+@contextmanager
+def stage(name):
+    """Time the block as `name` in the active rerun's breakdown (no-op when none is active)."""
+    stages = getattr(_local, "stages", None)
+    if stages is None:
+        yield
+        return
+    stack = _local.stack
+    stack.append(0.0)  # time spent in nested stages
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        stages[name] = stages.get(name, 0.0) + elapsed - nested
+        if stack:
+            stack[-1] += elapsed
+
+
+def _dump_path(page, capture):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", page).strip("_")
+    ext = CAPTURES[capture]
+    path = os.path.join(PROFILE_DIR, f"{slug}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.{ext}")
+    # keep only the newest dumps of each kind
+    for old in sorted(glob.glob(os.path.join(PROFILE_DIR, f"*.{ext}")), key=os.path.getmtime)[:-KEEP_DUMPS + 1]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+@contextmanager
+def run(page, capture=None):
+    """Profile one rerun of `page`; yields its result dict, filled in when the block exits.
+
+    capture: None, "cprofile" or "tracemalloc" to also dump that rerun to PROFILE_DIR.
+    """
+    result = {"page": page, "stages": {}, "total": 0.0, "dump": None}
+    _local.stages, _local.stack = result["stages"], []
+    profiler = None
+    started_tracing = False
+    if capture == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif capture == "tracemalloc" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["total"] = time.perf_counter() - start
+        _local.stages = _local.stack = None
+        if profiler is not None:
+            profiler.disable()
+            result["dump"] = _dump_path(page, capture)
+            profiler.dump_stats(result["dump"])
+        elif capture == "tracemalloc":
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            result["dump"] = _dump_path(page, capture)
+            snapshot.dump(result["dump"])
+        result["stages"][OTHER] = max(result["total"] - sum(result["stages"].values()), 0.0)
+        with _lock:
+            _history[page].append(dict(result["stages"], total=result["total"]))
+
+
+def percentiles(page):
+    """{stage: (p50, p95)} in seconds over the page's recent profiled reruns (0 where a rerun skipped it)."""
+    with _lock:
+        runs = list(_history.get(page, ()))
+    stages = sorted({name for entry in runs for name in entry})
+    return {
+        name: tuple(np.percentile([entry.get(name, 0.0) for entry in runs], [50, 95]))
+        for name in stages
+    }
+
+
+def summary():
+    """[(page, reruns, p50 total, p95 total)] for every profiled page."""
+    with _lock:
+        pages = {page: [entry["total"] for entry in runs] for page, runs in _history.items() if runs}
+    return [
+        (page, len(totals), *np.percentile(totals, [50, 95]))
+        for page, totals in sorted(pages.items())
+    ]
+
+
+def dumps():
+    """Saved capture files, newest first."""
+    paths = glob.glob(os.path.join(PROFILE_DIR, "*.prof")) + glob.glob(os.path.join(PROFILE_DIR, "*.tracemalloc"))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def reset():
+    with _lock:
+        _history.clear()
+
+
+def sidebar_overlay(result):
+    """Breakdown of one profiled rerun next to the page's rolling p50/p95, in the sidebar."""
+    import pandas as pd
+    import streamlit as st
+
+    rolling = percentiles(result["page"])
+    rows = [
+        {
+            "Stage": name,
+            "This rerun (ms)": seconds * 1000,
+            "p50 (ms)": rolling.get(name, (0.0, 0.0))[0] * 1000,
+            "p95 (ms)": rolling.get(name, (0.0, 0.0))[1] * 1000,
+        }
+        for name, seconds in sorted(result["stages"].items(), key=lambda item: -item[1])
+    ]
+    with st.sidebar.expander(f"⏱️ Rerun: {result['total'] * 1000:.0f} ms", expanded=True):
+        st.dataframe(
+            pd.DataFrame(rows).style.format(precision=1), hide_index=True, use_container_width=True
+        )
+        total_p50, total_p95 = rolling.get("total", (0.0, 0.0))
+        st.caption(f"Page total p50 {total_p50 * 1000:.0f} ms · p95 {total_p95 * 1000:.0f} ms")
+        if result["dump"]:
+            st.caption(f"Saved {result['dump']}")
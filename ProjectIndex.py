@@ -0,0 +1,119 @@
+import bisect
+import difflib
+import threading
+
+import numpy as np
+import pandas as pd
+
+# In-memory index from Project Name to row positions in Sheet1.
+# Built once per data version (see DataStore.project_index) and kept current when a save
+# moves rows between projects, so the Update Actuals filter and save path only touch the
+# rows of the projects involved. Supports exact, prefix and typo-tolerant lookup.
+# The index is shared across sessions: an edit builds the new state under a lock and swaps
+# it in with one assignment, so readers see the index before or after it, never a mix.
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+class ProjectIndex:
+    def __init__(self, positions, size):
+        self._lock = threading.Lock()
+        self.size = size
+        self._swap({name: np.asarray(rows, dtype=np.intp) for name, rows in positions.items()})
+
+    @classmethod
+    def build(cls, project_names):
+        """Index a Project Name column (Series); blank names are left out."""
+        values = project_names.reset_index(drop=True)
+        return cls(values.groupby(values, sort=False, observed=True).indices, len(values))
+
+    def _swap(self, positions):
+        # (lowercased, original) pairs kept sorted for bisect-based prefix search
+        ordered = sorted((str(name).lower(), name) for name in positions)
+        self._state = (positions, ordered, [key for key, _ in ordered])
+
+    @property
+    def _positions(self):
+        return self._state[0]
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def names(self):
+        return list(self._positions)
+
+    def get(self, name, default=_EMPTY):
+        return self._positions.get(name, default)
+
+    def rows(self, names):
+        """Sorted row positions for any of `names`."""
+        positions = self._positions
+        found = [positions[name] for name in names if name in positions]
+        return np.sort(np.concatenate(found)) if found else _EMPTY
+
+    def prefix(self, text):
+        """Project names starting with `text` (case-insensitive)."""
+        text = text.strip().lower()
+        _, ordered, keys = self._state
+        start = bisect.bisect_left(keys, text)
+        end = bisect.bisect_left(keys, text + "\uffff")
+        return [name for _, name in ordered[start:end]]
+
+    def fuzzy(self, text, limit=5, cutoff=0.6):
+        """Closest project names to `text`, tolerating typos (difflib ratio >= cutoff)."""
+        text = text.strip().lower()
+        if not text:
+            return []
+        _, ordered, keys = self._state
+        matches = difflib.get_close_matches(text, keys, n=limit, cutoff=cutoff)
+        lookup = dict(ordered)
+        return [lookup[key] for key in matches]
+
+    def search(self, text, mode="Exact"):
+        if not text:
+            return []
+        if mode == "Prefix":
+            return self.prefix(text)
+        if mode == "Fuzzy":
+            return self.prefix(text) or self.fuzzy(text)
+        return [text] if text in self._positions else []
+
+    @staticmethod
+    def _move(positions, position, old_name, new_name):
+        if old_name in positions:
+            remaining = positions[old_name][positions[old_name] != position]
+            if remaining.size:
+                positions[old_name] = remaining
+            else:
+                del positions[old_name]
+        if not pd.isna(new_name):
+            current = positions.get(new_name, _EMPTY)
+            positions[new_name] = np.sort(np.append(current, position))
+
+    def move(self, position, old_name, new_name):
+        """Keep the index current when a saved edit changes a row's Project Name."""
+        if old_name == new_name:
+            return
+        with self._lock:
+            positions = dict(self._positions)
+            self._move(positions, position, old_name, new_name)
+            self._swap(positions)
+
+    def apply_edits(self, original_df, edited_df, column="Project Name"):
+        """Move saved rows whose Project Name changed (edited_df keeps original_df's labels)."""
+        if column not in edited_df.columns:
+            return 0
+        before = original_df.loc[edited_df.index, column]
+        after = edited_df[column]
+        changed = (before != after).fillna(True) & ~(before.isna() & after.isna())
+        labels = edited_df.index[changed.to_numpy(dtype=bool)]
+        if len(labels):
+            with self._lock:
+                positions = dict(self._positions)
+                for label in labels:
+                    self._move(positions, original_df.index.get_loc(label), before[label], after[label])
+                self._swap(positions)
+        return int(changed.sum())
@@ -0,0 +1,147 @@
+import logging
+import sys
+import threading
+import time
+
+import Analytics
+import DataStore
+import FactTable
+import PartitionStore
+import ProjectIndex
+import RevenueCube
+import StorageBackend
+import Variance
+
+# Background refresh of the dashboard aggregates.
+# A daemon thread watches the data version (a stat of the workbook + journal, or the Mongo
+# write counter, plus the year partition files) and, after every change, rebuilds the
+# revenue cube, YTD summaries, year cube/totals, the MoM/YoY metric tables, the forecast
+# variance table, the month fact table and the editor's project index, then publishes them
+# together with DataStore.publish_many. Until that lands, pages keep reading the previous set
+# (DataStore.derived(..., stale_ok=True)), so Streamlit request threads never wait on
+# pandas work for these; a cold start or a failed refresh falls back to building inline.
+#
+# One refresh, timed: python RefreshWorker.py [workbook]
+
+POLL_INTERVAL_S = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def build_artifacts(excel_file=None):
+    """Everything the worker publishes: aggregates, metric / variance tables, month facts, project index."""
+    artifacts = RevenueCube.build_artifacts(excel_file)
+    artifacts.update(Analytics.build_artifacts(artifacts, excel_file))
+    artifacts["variance"] = Variance.build_variance(artifacts["revenue_cube"])
+    if not StorageBackend.get_backend(excel_file).pushdown:
+        # also warms the Sheet1 cache the update pages read
+        sheet1 = DataStore.load_sheet("Sheet1", excel_file)
+        artifacts["project_index:Sheet1"] = ProjectIndex.ProjectIndex.build(sheet1["Project Name"])
+    # long month facts need the full Sheet1 on every backend
+    artifacts["fact_table:Sheet1"] = FactTable.FactTable.build(DataStore.load_sheet("Sheet1", excel_file))
+    return artifacts
+
+
+class RefreshWorker:
+    """Rebuilds and publishes derived artifacts for one backend whenever its data changes."""
+
+    def __init__(self, excel_file=None, interval=POLL_INTERVAL_S):
+        self.excel_file = excel_file
+        self.interval = interval
+        self._wake = threading.Event()
+        self._thread = None
+        self._built = None  # (data version, partition stamp) of the last published set
+        self.stats = {
+            "refreshes": 0, "last_seconds": 0.0, "total_seconds": 0.0,
+            "published_version": None, "failed_version": None, "last_error": None,
+        }
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def serves(self, backend, version):
+        """True if this worker will (re)build `version` for `backend`, so a stale read may wait for it."""
+        return (
+            self.running()
+            and backend.key == StorageBackend.get_backend(self.excel_file).key
+            and self.stats["failed_version"] != version
+        )
+
+    def kick(self):
+        """Check the data version now instead of at the next poll."""
+        self._wake.set()
+
+    def refresh(self):
+        """Rebuild and publish if the data changed since the last refresh; True if it published."""
+        version = DataStore.data_version(self.excel_file)
+        built = (version, PartitionStore.version(self.excel_file))
+        if built == self._built or version == self.stats["failed_version"]:
+            return False
+        start = time.perf_counter()
+        try:
+            artifacts = build_artifacts(self.excel_file)
+        except Exception as e:
+            # readers of this version build inline instead of waiting; the next change retries
+            self.stats["failed_version"] = version
+            self.stats["last_error"] = f"{type(e).__name__}: {e}"
+            raise
+        # Published under the version read *before* building: if a write landed meanwhile,
+        # the set is already stale for readers and the next pass rebuilds it.
+        DataStore.publish_many(artifacts, version, self.excel_file)
+        elapsed = time.perf_counter() - start
+        self.stats["refreshes"] += 1
+        self.stats["last_seconds"] = elapsed
+        self.stats["total_seconds"] += elapsed
+        self.stats["published_version"] = version
+        self.stats["last_error"] = None
+        self._built = built
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:  # keep the worker alive; the next data change retries (error in stats)
+                logger.exception("Dashboard refresh failed for %s", self.excel_file or DataStore.EXCEL_FILE)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if not self.running():
+            self._thread = threading.Thread(target=self._run, name="dashboard-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start(excel_file=None, interval=POLL_INTERVAL_S):
+    """Start (once per process) the refresh worker and route stale_ok reads through it."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = RefreshWorker(excel_file, interval)
+            DataStore.set_refresher(_worker)
+        return _worker.start()
+
+
+def worker_stats():
+    """The running worker's counters, or None if no worker was started in this process."""
+    if _worker is None:
+        return None
+    stats = dict(_worker.stats)
+    stats["running"] = _worker.running()
+    return stats
+
+
+def main(argv):
+    excel_file = argv[0] if argv else None
+    started = time.perf_counter()
+    artifacts = build_artifacts(excel_file)
+    print(f"Built {len(artifacts)} artifacts in {time.perf_counter() - started:.3f}s: {', '.join(sorted(artifacts))}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,355 @@
+import argparse
+import glob
+import hashlib
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from docx import Document
+from docx.shared import Inches
+from fpdf import FPDF
+from matplotlib.figure import Figure  # renders with the Agg canvas; no pyplot / GUI state
+
+import Analytics
+import DataStore
+import FactTable
+import PartitionStore
+import RevenueCube
+import StorageBackend
+import Variance
+
+# Offline management reports (PDF / DOCX) instead of dashboard screenshots.
+# Each report covers the company or one service line / region and holds the Home view (YTD
+# actuals, latest month with MoM / rolling / YoY, YTD breakdown), the Actuals Vs Forecast
+# view (monthly actuals vs forecast, worst forecast accuracy) and, for the company report,
+# the Actuals By Year view (revenue per year with year-over-year deltas).
+#
+# This process reads the cached aggregates once (revenue cube, Analytics and Variance
+# tables, year totals) and cuts a small input dict per report; charts and documents are
+# rendered in a pool of spawned processes, so many reports build in parallel and no
+# Streamlit session or request thread does any of the work. Files are named by data
+# version, scope and report date: a rerun the same day on unchanged data skips reports
+# that already exist without reading anything for them.
+#
+#   python ReportWorker.py                                  # company report, PDF + DOCX
+#   python ReportWorker.py --by ServiceLine Region --format pdf --workers 4
+
+REPORT_DIR = ".reports"
+SCOPES = ["company", "ServiceLine", "Region"]
+FORMATS = ["pdf", "docx"]
+TOP_N = 10
+DPI = 110
+
+
+# ---- Inputs (parent process, from the cached aggregates) ----
+
+def scopes(by, excel_file=None):
+    """[(dimension, member)] for `by` in SCOPES; the company report is (None, None)."""
+    if by == "company":
+        return [(None, None)]
+    members = RevenueCube.get_cube(excel_file)[by].dropna().unique()
+    return [(by, member) for member in sorted(members)]
+
+
+def scope_name(dimension=None, member=None):
+    return "Company" if dimension is None else f"{dimension}_{member}"
+
+
+def report_inputs(dimension=None, member=None, as_of=None, excel_file=None):
+    """Everything one report shows, as small frames and numbers (pickled to a pool worker)."""
+    cube = RevenueCube.get_cube(excel_file)
+    if dimension is None:
+        metrics = Analytics.project_metrics(excel_file).combined()
+    else:
+        # only the scope's own rows: a project can have associates in several regions / service lines
+        cube = cube[cube[dimension] == member]
+        metrics = Analytics.build_project_metrics(cube, excel_file, scope=(dimension, member)).combined()
+    breakdown_by = "Region" if dimension == "ServiceLine" else "ServiceLine"
+    latest_month = metrics.latest_month()
+
+    monthly = cube.groupby(["Month", "Metric"], observed=True)["Value"].sum().unstack("Metric")
+    monthly = monthly.reindex(columns=FactTable.METRICS).reset_index()
+    monthly["Month"] = monthly["Month"].astype(str)
+
+    variance = Variance.get_variance(excel_file).top(
+        TOP_N, "MAPE %",
+        service_lines=[member] if dimension == "ServiceLine" else None,
+        regions=[member] if dimension == "Region" else None,
+    )
+    return {
+        "title": "Company" if dimension is None else f"{dimension}: {member}",
+        "scope": scope_name(dimension, member),
+        "as_of": as_of or date.today().isoformat(),
+        "ytd": RevenueCube.total(cube),
+        "latest_month": latest_month,
+        "latest": metrics.at(latest_month) if latest_month else None,
+        "live_year": Analytics.LIVE_YEAR,
+        "monthly": monthly,
+        "breakdown_by": breakdown_by,
+        "breakdown": RevenueCube.totals_by(cube, breakdown_by).sort_values("Value", ascending=False),
+        "variance": variance[["Project Name", "Actuals", "Forecast", "Variance", "MAPE %", "Bias %"]],
+        # Sheet3 / year partitions are company totals only
+        "years": Analytics.year_over_year(FactTable.MONTHS, excel_file) if dimension is None else None,
+    }
+
+
+# ---- Rendering (pool workers) ----
+
+def _money(value):
+    return "-" if value is None or pd.isna(value) else f"${value:,.0f}"
+
+
+def _signed_pct(value):
+    return "-" if value is None or pd.isna(value) else f"{value:+.1f}%"
+
+
+def _with_change(value, pct, label):
+    return _money(value) if pd.isna(pct) else f"{_money(value)} ({_signed_pct(pct)} {label})"
+
+
+def _headline(inputs):
+    """[(label, value)] for the Home view's metrics."""
+    rows = [("YTD Actuals", _money(inputs["ytd"]))]
+    latest = inputs["latest"]
+    if latest is not None:
+        month = inputs["latest_month"]
+        rows += [
+            (f"{month} Actuals", _with_change(latest["Value"], latest["MoM %"], "MoM")),
+            (f"{Analytics.ROLLING} average", _money(latest[Analytics.ROLLING])),
+            (f"vs {month} {inputs['live_year'] - 1}", _with_change(latest["YoY"], latest["YoY %"], "YoY")),
+        ]
+    return rows
+
+
+def _tables(inputs):
+    """[(heading, frame of display strings)] shared by the PDF and DOCX layouts."""
+    variance = inputs["variance"]
+    tables = [(
+        f"Lowest forecast accuracy (top {TOP_N} by MAPE)",
+        pd.DataFrame({
+            "Project": variance["Project Name"].astype(str),
+            "Actuals": variance["Actuals"].map(_money), "Forecast": variance["Forecast"].map(_money),
+            "Variance": variance["Variance"].map(_money),
+            "MAPE": variance["MAPE %"].map(lambda v: "-" if pd.isna(v) else f"{v:.1f}%"),
+            "Bias": variance["Bias %"].map(_signed_pct),
+        }),
+    )]
+    if inputs["years"] is not None:
+        years = inputs["years"]
+        tables.append(("Revenue by year", pd.DataFrame({
+            "Year": years["Year"].astype(str), "Revenue": years["Revenue"].map(_money),
+            "Change": years["Delta_M"].map(lambda v: "-" if pd.isna(v) else f"{v:+.1f}M"),
+            "Change %": years["Delta %"].map(_signed_pct),
+        })))
+    return tables
+
+
+def _save(fig, folder, name):
+    path = os.path.join(folder, f"{name}.png")
+    fig.savefig(path, dpi=DPI, bbox_inches="tight")
+    return path
+
+
+def render_charts(inputs, folder):
+    """[(caption, png path)] for the report's charts."""
+    charts = []
+
+    monthly = inputs["monthly"]
+    fig = Figure(figsize=(8, 3.2))
+    ax = fig.subplots()
+    x = np.arange(len(monthly))
+    for offset, metric, color in [(-0.2, "Actuals", "#ff7f0e"), (0.2, "Forecast", "#1f77b4")]:
+        ax.bar(x + offset, monthly[metric].fillna(0), width=0.4, label=metric, color=color)
+    ax.set_xticks(x, [month[:3] for month in monthly["Month"]])
+    ax.yaxis.set_major_formatter(lambda value, _: f"${value:,.0f}")
+    ax.legend(frameon=False)
+    ax.spines[["top", "right"]].set_visible(False)
+    charts.append(("Actuals vs Forecast by month", _save(fig, folder, "monthly")))
+
+    breakdown = inputs["breakdown"]
+    if len(breakdown):
+        fig = Figure(figsize=(8, 0.4 * len(breakdown) + 1))
+        ax = fig.subplots()
+        ax.barh(breakdown[inputs["breakdown_by"]].astype(str), breakdown["Value"], color="#90caf9")
+        ax.invert_yaxis()
+        for y, value in enumerate(breakdown["Value"]):
+            ax.text(value, y, f" {_money(value)}", va="center", fontsize=8)
+        ax.xaxis.set_major_formatter(lambda value, _: f"${value:,.0f}")
+        ax.spines[["top", "right"]].set_visible(False)
+        charts.append((f"YTD Actuals by {inputs['breakdown_by']}", _save(fig, folder, "breakdown")))
+
+    years = inputs["years"]
+    if years is not None and len(years):
+        fig = Figure(figsize=(8, 3))
+        ax = fig.subplots()
+        labels = years["Year"].astype(str)
+        ax.bar(labels, years["Revenue_M"], color="#1f77b4")
+        for i, (value, delta) in enumerate(zip(years["Revenue_M"], years["Delta_M"])):
+            ax.text(i, value, f"{value:.1f}M" + ("" if pd.isna(delta) else f"\n({delta:+.1f}M)"), ha="center", va="bottom", fontsize=8)
+        ax.set_ylabel("Revenue (Millions)")
+        ax.spines[["top", "right"]].set_visible(False)
+        charts.append(("Revenue by year", _save(fig, folder, "years")))
+    return charts
+
+
+def _latin1(text):
+    # FPDF 1.7's core fonts only cover Latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def write_pdf(inputs, charts, path):
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, _latin1(f"Revenue report - {inputs['title']}"), ln=1)
+    pdf.set_font("Helvetica", "", 9)
+    pdf.cell(0, 6, _latin1(f"As of {inputs['as_of']}"), ln=1)
+    pdf.ln(2)
+
+    pdf.set_font("Helvetica", "", 11)
+    for label, value in _headline(inputs):
+        pdf.cell(60, 7, _latin1(label))
+        pdf.cell(0, 7, _latin1(value), ln=1)
+    pdf.ln(3)
+
+    for caption, image in charts:
+        pdf.set_font("Helvetica", "B", 12)
+        pdf.cell(0, 8, _latin1(caption), ln=1)
+        pdf.image(image, w=180)
+        pdf.ln(2)
+
+    for heading, table in _tables(inputs):
+        pdf.set_font("Helvetica", "B", 12)
+        pdf.cell(0, 8, _latin1(heading), ln=1)
+        width = 180 / len(table.columns)
+        pdf.set_font("Helvetica", "B", 9)
+        for column in table.columns:
+            pdf.cell(width, 6, _latin1(column), border=1)
+        pdf.ln()
+        pdf.set_font("Helvetica", "", 9)
+        for row in table.itertuples(index=False):
+            for value in row:
+                pdf.cell(width, 6, _latin1(value), border=1)
+            pdf.ln()
+        pdf.ln(3)
+    pdf.output(path, "F")
+
+
+def write_docx(inputs, charts, path):
+    doc = Document()
+    doc.add_heading(f"Revenue report – {inputs['title']}", level=0)
+    doc.add_paragraph(f"As of {inputs['as_of']}")
+
+    headline = doc.add_table(rows=0, cols=2)
+    for label, value in _headline(inputs):
+        cells = headline.add_row().cells
+        cells[0].text, cells[1].text = label, value
+
+    for caption, image in charts:
+        doc.add_heading(caption, level=2)
+        doc.add_picture(image, width=Inches(6.3))
+
+    for heading, table in _tables(inputs):
+        doc.add_heading(heading, level=2)
+        grid = doc.add_table(rows=1, cols=len(table.columns))
+        grid.style = "Table Grid"
+        for cell, column in zip(grid.rows[0].cells, table.columns):
+            cell.text = column
+        for row in table.itertuples(index=False):
+            for cell, value in zip(grid.add_row().cells, row):
+                cell.text = value
+    doc.save(path)
+
+
+_WRITERS = {"pdf": write_pdf, "docx": write_docx}
+
+
+def render_report(inputs, paths):
+    """Pool task: charts once, then every requested {format: path}; returns the paths written."""
+    with tempfile.TemporaryDirectory(prefix="report-") as folder:
+        charts = render_charts(inputs, folder)
+        for fmt, path in paths.items():
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            _WRITERS[fmt](inputs, charts, tmp_path)
+            os.replace(tmp_path, path)
+    return list(paths.values())
+
+
+# ---- Pool ----
+
+def _file_stem(scope, as_of, excel_file):
+    # the version the (stale_ok) aggregates reflect, as for DataExport files
+    backend = StorageBackend.get_backend(excel_file)
+    version = (DataStore.view_version(excel_file), PartitionStore.version(excel_file))
+    digest = hashlib.sha1(repr((backend.key, version, scope, as_of)).encode()).hexdigest()[:12]
+    return f"Revenue_{re.sub(r'[^A-Za-z0-9_.-]+', '-', scope)}", digest
+
+
+def generate(by=("company",), formats=FORMATS, workers=None, out_dir=REPORT_DIR, excel_file=None):
+    """{"written": [paths], "reused": [paths]} for one report per scope of every `by` in SCOPES."""
+    os.makedirs(out_dir, exist_ok=True)
+    as_of = date.today().isoformat()
+    jobs, reused = [], []
+    for dimension in by:
+        for scope in scopes(dimension, excel_file):
+            name, digest = _file_stem(scope_name(*scope), as_of, excel_file)
+            paths = {fmt: os.path.join(out_dir, f"{name}.{digest}.{fmt}") for fmt in formats}
+            reused += [path for path in paths.values() if os.path.exists(path)]
+            missing = {fmt: path for fmt, path in paths.items() if not os.path.exists(path)}
+            if missing:
+                # inputs are only read for reports that are rendered
+                jobs.append((name, report_inputs(*scope, as_of=as_of, excel_file=excel_file), missing))
+
+    written = []
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        for _, inputs, paths in jobs:
+            written += render_report(inputs, paths)
+    else:
+        # spawned, not forked: the parent may be a Streamlit server with live threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(render_report, inputs, paths) for _, inputs, paths in jobs]
+            for future in as_completed(futures):
+                written += future.result()
+
+    # Reports of older data versions are not needed any more
+    for name, _, paths in jobs:
+        for fmt, path in paths.items():
+            for old in glob.glob(os.path.join(out_dir, f"{name}.*.{fmt}")):
+                if old != path:
+                    try:
+                        os.remove(old)
+                    except OSError:
+                        pass
+    return {"written": sorted(written), "reused": sorted(reused)}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Render revenue reports to PDF / DOCX from the cached aggregates")
+    parser.add_argument("--by", nargs="+", choices=SCOPES, default=["company"], help="one report per member of each")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=FORMATS, dest="formats")
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count; 1 renders inline)")
+    parser.add_argument("--out", default=REPORT_DIR)
+    parser.add_argument("--workbook", default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = generate(args.by, args.formats, args.workers, args.out, args.workbook)
+    elapsed = time.perf_counter() - start
+    for path in result["written"]:
+        print(path)
+    print(f"{len(result['written'])} file(s) written, {len(result['reused'])} unchanged, in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # ships with streamlit
+import pyarrow.compute as pc
+
+import DataStore
+import FactTable
+import PartitionStore
+
+# Pre-aggregated revenue cube over Sheet1.
+# One row per (ServiceLine, Region, Project Name, Month, Metric) with the summed Value,
+# built once per data version. Page filters and charts answer from the cube, so their
+# cost follows the number of groups rather than the number of associate rows.
+# Dashboard reads (get_cube, ytd_summary, get_year_cube, year_summary) accept the last
+# published artifacts while a RefreshWorker rebuilds them; build_artifacts is that rebuild.
+
+DIMENSIONS = ["ServiceLine", "Region", "Project Name"]
+METRICS = FactTable.METRICS
+month_columns = FactTable.month_columns
+
+
+def build_cube(df):
+    parsed = month_columns(df.columns)
+    value_cols = [col for col, _, _ in parsed]
+    grouped = df[value_cols].astype("float64").groupby(
+        [df[dim] for dim in DIMENSIONS], dropna=False, sort=False, observed=True
+    ).sum()
+
+    cube = grouped.reset_index().melt(id_vars=DIMENSIONS, var_name="Column", value_name="Value")
+    # canonical calendar months, shared with FactTable and the Sheet3 year cube
+    cube["Month"] = pd.Categorical(cube["Column"].map({col: month for col, month, _ in parsed}), dtype=FactTable.MONTH_DTYPE)
+    cube["Metric"] = cube["Column"].map({col: metric for col, _, metric in parsed})
+    return cube[DIMENSIONS + ["Month", "Metric", "Value"]]
+
+
+def build_revenue_cube(excel_file=None):
+    # group totals are pushed down to the backend when it supports it (MongoDB $group)
+    value_cols = [col for col, _, _ in month_columns(DataStore.sheet_columns("Sheet1", excel_file))]
+    return build_cube(DataStore.group_totals("Sheet1", DIMENSIONS, value_cols, excel_file))
+
+
+def get_cube(excel_file=None, stale_ok=True):
+    return DataStore.derived("revenue_cube", lambda: build_revenue_cube(excel_file), excel_file, stale_ok)
+
+
+def _select(cube, metric="Actuals", months=None, projects=None):
+    mask = cube["Metric"] == metric
+    if months is not None:
+        mask &= cube["Month"].isin(months)
+    if projects is not None:
+        mask &= cube["Project Name"].isin(projects)
+    return cube[mask]
+
+
+def total(cube, metric="Actuals", months=None, projects=None):
+    return _select(cube, metric, months, projects)["Value"].sum()
+
+
+def totals_by(cube, dimension, metric="Actuals", months=None, projects=None):
+    """Summed Value per dimension member (rows with a blank member are left out)."""
+    selected = _select(cube, metric, months, projects)
+    return selected.groupby(dimension, as_index=False, observed=True)["Value"].sum()
+
+
+def months(cube, metric="Actuals"):
+    present = cube.loc[cube["Metric"] == metric, "Month"].unique()
+    return [month for month in cube["Month"].cat.categories if month in set(present)]
+
+
+def projects(cube):
+    return cube["Project Name"].dropna().unique().tolist()
+
+
+# ---- Labels (whole-column string building with Arrow kernels, no per-row format calls) ----
+
+_GROUPS = pa.array([str(i) for i in range(1000)])
+_PADDED = pa.array([f"{i:03d}" for i in range(1000)])
+
+
+def _digits(n, sep=","):
+    # non-negative int64 array -> "1,234,567" (or "1234567" with sep="") as Arrow strings
+    head = n % 1000
+    rest = n // 1000
+    tail = None
+    while rest.any():
+        more = pa.array(rest > 0)
+        piece = _PADDED.take(head) if tail is None else pc.binary_join_element_wise(_PADDED.take(head), tail, sep)
+        tail = pc.if_else(more, piece, tail)
+        head = np.where(rest > 0, rest % 1000, head)
+        rest = rest // 1000
+    if tail is None:
+        return _GROUPS.take(head)
+    return pc.coalesce(pc.binary_join_element_wise(_GROUPS.take(head), tail, sep), _GROUPS.take(head))
+
+
+def _labels(parts, missing):
+    labels = pc.binary_join_element_wise(*parts, "")
+    return pd.array(pc.if_else(pa.array(missing), "", labels), dtype=pd.ArrowDtype(pa.string()))
+
+
+def _sign(values, missing):
+    # like format(): "-" for every negative input, including ones that round to zero
+    return (np.signbit(values) & ~missing).astype(np.int8)
+
+
+def money_labels(values):
+    """f"${x:,.0f}" for a whole column (blank where the value is missing)."""
+    values = np.asarray(values, dtype="float64")
+    missing = np.isnan(values)
+    # rint on the value itself is exact, and rounds ties to even as format() does
+    whole = np.rint(np.where(missing, 0.0, values))
+    sign = pa.array(["$", "$-"]).take(_sign(values, missing))
+    return _labels([sign, _digits(np.abs(whole).astype(np.int64))], missing)
+
+
+def _tenths(values):
+    # round(x, 1) * 10 as format(x, ".1f") rounds it: x * 10 is itself rounded, so values
+    # within a hair of a .x5 boundary (7.55, 0.45, ...) are decided by format() instead
+    scaled = values * 10
+    tenths = np.rint(scaled)
+    near = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-9 * np.maximum(1.0, np.abs(scaled))
+    for i in np.flatnonzero(near):
+        tenths[i] = round(float(format(values[i], ".1f")) * 10)
+    return tenths
+
+
+def millions_labels(values):
+    """f"{x:.1f}M" for a whole column already expressed in millions."""
+    values = np.asarray(values, dtype="float64")
+    missing = np.isnan(values)
+    tenths = _tenths(np.where(missing, 0.0, values))
+    magnitude = np.abs(tenths).astype(np.int64)
+    sign = pa.array(["", "-"]).take(_sign(values, missing))
+    return _labels([sign, _digits(magnitude // 10, sep=""), ".", _GROUPS.take(magnitude % 10), "M"], missing)
+
+
+YTD_DIMENSIONS = ["ServiceLine", "Region"]
+
+
+def build_ytd_summary(cube, dimension):
+    summary = totals_by(cube, dimension).rename(columns={"Value": "Actuals_YTD"})
+    summary["RevenueLabel"] = money_labels(summary["Actuals_YTD"])
+    return summary
+
+
+def ytd_summary(dimension, excel_file=None):
+    """YTD Actuals per `dimension` member with its "$1,234" label, built once per data version."""
+    return DataStore.derived(
+        f"ytd_summary:{dimension}",
+        lambda: build_ytd_summary(get_cube(excel_file, stale_ok=False), dimension),
+        excel_file, stale_ok=True,
+    )
+
+
+# ---- Yearly totals (Sheet3, and project-level partitions where a year has them) ----
+
+MONTH_TO_QUARTER = FactTable.QUARTERS
+
+
+def build_year_cube(sheet3_df, fact_totals=None):
+    df_melted = sheet3_df.melt(id_vars=["Total Revenue ($)"], var_name="Year", value_name="Revenue")
+    df_melted = df_melted.rename(columns={"Total Revenue ($)": "Month"})
+    df_melted["Month"] = FactTable.month_categorical(df_melted["Month"])
+    # year headers come back as text from the snapshot; partitions use int years
+    df_melted["Year"] = df_melted["Year"].map(lambda year: int(year) if str(year).isdigit() else year)
+    if fact_totals is not None and len(fact_totals):
+        # years with an Actuals partition are totalled from their project-level facts
+        df_melted = df_melted[~df_melted["Year"].isin(fact_totals["Year"].unique())]
+        df_melted = pd.concat([df_melted, fact_totals], ignore_index=True)
+    df_melted["Revenue_M"] = df_melted["Revenue"] / 1_000_000
+    df_melted["RevenueLabel"] = millions_labels(df_melted["Revenue_M"])
+    df_melted["Quarter"] = df_melted["Month"].map(MONTH_TO_QUARTER)
+    return df_melted
+
+
+def with_shares(year_rows):
+    """A filtered slice of the year cube plus its selection-relative ShareOfTotal/MonthRank, as a new frame."""
+    revenue = year_rows["Revenue"]
+    return year_rows.assign(
+        ShareOfTotal=revenue / revenue.sum() * 100,
+        MonthRank=revenue.rank(method="min", ascending=False).astype(int),
+    )
+
+
+def partitioned_name(name, excel_file):
+    # year artifacts also depend on the partition files, which the data version doesn't cover
+    return f"{name}@{PartitionStore.version(excel_file)}"
+
+
+def build_full_year_cube(excel_file=None):
+    return build_year_cube(DataStore.load_sheet("Sheet3", excel_file), PartitionStore.year_totals(excel_file=excel_file))
+
+
+def get_year_cube(excel_file=None, stale_ok=True):
+    return DataStore.derived(
+        partitioned_name("year_cube", excel_file), lambda: build_full_year_cube(excel_file), excel_file, stale_ok
+    )
+
+
+def build_year_totals(year_cube):
+    """Revenue per Month (rows) and Year (columns), so any month selection is one masked sum."""
+    totals = year_cube.groupby(["Month", "Year"], dropna=False, sort=False, observed=True)["Revenue"].sum()
+    return totals.unstack("Year").sort_index(axis=1)
+
+
+def get_year_totals(excel_file=None, stale_ok=True):
+    return DataStore.derived(
+        partitioned_name("year_totals", excel_file),
+        lambda: build_year_totals(get_year_cube(excel_file, stale_ok=False)),
+        excel_file, stale_ok,
+    )
+
+
+def year_summary(months, excel_file=None):
+    """Year, Revenue and Revenue_M summed over the selected months, one row per year."""
+    totals = get_year_totals(excel_file)
+    revenue = totals[totals.index.isin(months)].sum()
+    summary = revenue.rename_axis("Year").reset_index(name="Revenue")
+    summary["Revenue_M"] = summary["Revenue"] / 1_000_000
+    return summary
+
+
+# ---- Background refresh ----
+
+def build_artifacts(excel_file=None):
+    """{artifact name: value} for every dashboard aggregate above, from one pass over the data."""
+    cube = build_revenue_cube(excel_file)
+    year_cube = build_full_year_cube(excel_file)
+    artifacts = {
+        "revenue_cube": cube,
+        partitioned_name("year_cube", excel_file): year_cube,
+        partitioned_name("year_totals", excel_file): build_year_totals(year_cube),
+    }
+    for dimension in YTD_DIMENSIONS:
+        artifacts[f"ytd_summary:{dimension}"] = build_ytd_summary(cube, dimension)
+    return artifacts
@@ -0,0 +1,109 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+import ChartCache
+import DataExport
+import DataStore
+import Journal
+import PageRegistry
+import Profiler
+import RefreshWorker
+
+
+def show_page():
+    st.title("⚙️ Settings")
+    st.write("Control app preferences, theme options, or configuration.")
+
+    st.markdown("### 🗄️ Data Cache")
+    stats = DataStore.cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Cache Hits", stats["hits"])
+    c2.metric("Cache Misses", stats["misses"])
+    c3.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+    c4.metric("Total Load Time", f"{stats['load_seconds']:.2f}s")
+    st.caption(f"Last load: {stats['last_load_seconds']:.3f}s · Cached sheets: {', '.join(stats['cached_sheets']) or 'none'}")
+    if st.button("♻️ Clear Data Cache"):
+        DataStore.clear_cache()
+        st.success("Data cache cleared.")
+
+    st.markdown("### 📈 Chart Cache")
+    chart_stats = ChartCache.cache_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Chart Hits", chart_stats["hits"])
+    c2.metric("Chart Misses", chart_stats["misses"])
+    c3.metric("Hit Rate", f"{chart_stats['hit_rate']:.0%}")
+    c4.metric("Build Time", f"{chart_stats['build_seconds']:.2f}s")
+    st.caption(f"Cached specs: {chart_stats['entries']}/{ChartCache.MAX_ENTRIES} · Evictions: {chart_stats['evictions']}")
+    if st.button("♻️ Clear Chart Cache"):
+        ChartCache.clear_cache()
+        st.success("Chart cache cleared.")
+
+    refresh = RefreshWorker.worker_stats()
+    if refresh is not None:
+        status = "running" if refresh["running"] else "stopped"
+        st.caption(
+            f"Background refresh: {status} · {refresh['refreshes']} refresh(es) · "
+            f"last {refresh['last_seconds']:.3f}s"
+        )
+        if refresh["last_error"]:
+            st.warning(f"Last background refresh failed: {refresh['last_error']}")
+
+    st.caption(f"Storage backend: {stats['backend']}")
+
+    st.markdown("### ⏱️ Profiling")
+    # kept outside the widget key so the setting survives visits to other pages
+    def _toggle_profiling():
+        st.session_state["profiling"] = st.session_state["profiling_toggle"]
+
+    st.toggle(
+        "Show per-rerun stage timings in the sidebar",
+        value=st.session_state.get("profiling", False),
+        key="profiling_toggle",
+        on_change=_toggle_profiling,
+    )
+    if st.session_state.get("profiling"):
+        c1, c2, c3 = st.columns(3)
+        if c1.button("🧪 cProfile next page view"):
+            st.session_state["profile_capture"] = "cprofile"
+        if c2.button("🧠 tracemalloc next page view"):
+            st.session_state["profile_capture"] = "tracemalloc"
+        if c3.button("♻️ Reset timings"):
+            Profiler.reset()
+        if st.session_state.get("profile_capture"):
+            st.info(f"The next page view will be captured with {st.session_state['profile_capture']} into {Profiler.PROFILE_DIR}/.")
+
+        rolling = Profiler.summary()
+        if rolling:
+            st.dataframe(
+                pd.DataFrame(
+                    [(page, runs, p50 * 1000, p95 * 1000) for page, runs, p50, p95 in rolling],
+                    columns=["Page", "Reruns", "p50 (ms)", "p95 (ms)"],
+                ).style.format(precision=1),
+                hide_index=True, use_container_width=True,
+            )
+        if PageRegistry.load_times:
+            imports = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in sorted(PageRegistry.load_times.items()))
+            st.caption(f"Page import times: {imports}")
+        saved = Profiler.dumps()
+        if saved:
+            st.caption("Saved captures: " + ", ".join(os.path.basename(path) for path in saved[:5]))
+
+    st.markdown("### 📤 Data Export")
+    DataExport.export_button("Sheet1 (all rows)", "Sheet1", DataExport.sheet1, key="export_sheet1")
+    DataExport.export_button(
+        "Actuals & Forecast per Project", "ProjectActualsForecast", DataExport.project_actuals_forecast,
+        key="export_projects"
+    )
+
+    if stats["backend"] == "xlsx":
+        st.markdown("### 📝 Pending Submissions")
+        pending = Journal.pending_count(DataStore.EXCEL_FILE)
+        st.write(f"{pending} new row(s) waiting in the journal to be written to the workbook.")
+        compaction_error = Journal.compaction_error(DataStore.EXCEL_FILE)
+        if compaction_error:
+            st.warning(f"Last background compaction failed: {compaction_error}")
+        if st.button("🗜️ Compact Now", disabled=not pending):
+            compacted = Journal.compact(DataStore.EXCEL_FILE)
+            st.success(f"Wrote {compacted} row(s) to the workbook.")
@@ -0,0 +1,230 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import Journal
+import WriteCoordinator
+from WriteCoordinator import WriteConflict
+
+# Incremental save path for edited sheet rows.
+# Edited rows are diffed against the original rows by a stable key
+# (AssociateID + Project Name), only the changed cells are written in place,
+# and the workbook is saved once. No delete_rows / append shuffling.
+# Pending AddingUser journal rows are folded into the same save, so they can be edited too.
+# Saves run under WriteCoordinator's workbook lock and replace the file atomically; an
+# editor working from an older workbook version only gets through if nobody else
+# changed the cells it is about to overwrite (WriteConflict otherwise).
+
+KEY_COLUMNS = ("AssociateID", "Project Name")
+
+
+def _norm_key(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _cell_value(value):
+    # numpy / pandas scalars -> plain python values openpyxl understands
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def row_keys(df, key_columns=KEY_COLUMNS):
+    """(key..., occurrence) per row, so duplicated keys pair up in sheet order."""
+    keys = df[list(key_columns)].apply(lambda col: col.map(_norm_key))
+    occurrence = keys.groupby(list(key_columns), sort=False, observed=True).cumcount()
+    return pd.Series(list(zip(*[keys[col] for col in key_columns], occurrence)), index=df.index)
+
+
+def diff_rows(original_df, edited_df):
+    """Changed cells as {index_label: {column: new_value}}."""
+    columns = [col for col in edited_df.columns if col in original_df.columns]
+    before = original_df.loc[edited_df.index, columns].astype(object)
+    after = edited_df[columns].astype(object)
+    same = (before.values == after.values) | (pd.isna(before.values) & pd.isna(after.values))
+    changes = {}
+    for r, c in zip(*np.nonzero(~same)):
+        changes.setdefault(edited_df.index[r], {})[columns[c]] = after.iat[r, c]
+    return changes
+
+
+def cell_values(original_df, edited_df):
+    """The original values of the cells edited_df changes, {label: {column: value}}."""
+    return {
+        label: {col: original_df.at[label, col] for col in cols}
+        for label, cols in diff_rows(original_df, edited_df).items()
+    }
+
+
+def _locate_by_position(ws, header, positions, key_columns=KEY_COLUMNS):
+    """Row numbers straight from DataFrame positions, verified against the key cells.
+
+    Returns None if any row doesn't match (e.g. blank rows skipped by the reader),
+    in which case the caller falls back to a full key scan.
+    """
+    key_cols = [header.index(col) + 1 for col in key_columns]
+    found = {}
+    for key, position in positions.items():
+        row_no = int(position) + 2
+        cells = tuple(_norm_key(ws.cell(row=row_no, column=col).value) for col in key_cols)
+        if cells != key[:-1]:
+            return None
+        found[key] = row_no
+    return found
+
+
+def _locate_rows(ws, header, wanted, key_columns=KEY_COLUMNS):
+    """Single pass over the key columns: stable key -> worksheet row number."""
+    key_idx = [header.index(col) for col in key_columns]
+    first, last = min(key_idx) + 1, max(key_idx) + 1
+    seen = {}
+    found = {}
+    for row_no, values in enumerate(
+        ws.iter_rows(min_row=2, min_col=first, max_col=last, values_only=True), start=2
+    ):
+        base = tuple(_norm_key(values[i - first + 1]) for i in key_idx)
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        key = base + (occurrence,)
+        if key in wanted:
+            found[key] = row_no
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def save_changes(
+    original_df, edited_df, excel_file, sheet_name, key_columns=KEY_COLUMNS,
+    expected_version=None, base_values=None,
+):
+    """Write only the cells of edited_df that differ from original_df.
+
+    original_df is the full sheet as loaded (used to derive each row's stable key);
+    edited_df keeps the index labels of the rows it was built from.
+    expected_version is the workbook file version the edits were made against and
+    base_values the values the editor started from (see cell_values); when the workbook
+    has moved on since, each target cell must still hold its base value.
+    Returns the number of cells written.
+    """
+    changes = diff_rows(original_df, edited_df)
+    if not changes:
+        return 0
+
+    from openpyxl import load_workbook
+
+    keys = row_keys(original_df, key_columns)
+    wanted = {keys[label]: label for label in changes}
+
+    with WriteCoordinator.workbook_lock(excel_file):
+        stale = (
+            expected_version is not None
+            and WriteCoordinator.file_version(excel_file) != tuple(expected_version)
+        )
+        wb = load_workbook(excel_file)
+        claimed = Journal.claim(excel_file)
+        Journal.apply(wb, Journal.read_entries(claimed))
+        ws = wb[sheet_name]
+        header = [cell.value for cell in ws[1]]
+        missing = [col for cols in changes.values() for col in cols if col not in header]
+        if missing:
+            raise ValueError(f"Columns not found in {sheet_name}: {sorted(set(missing))}")
+
+        # Touch only the edited rows when positions line up with the sheet; scan otherwise
+        positions = dict(zip(wanted, original_df.index.get_indexer(list(wanted.values()))))
+        rows = _locate_by_position(ws, header, positions, key_columns)
+        if rows is None:
+            rows = _locate_rows(ws, header, wanted, key_columns)
+        if len(rows) != len(wanted):
+            lost = [key[:-1] for key in wanted if key not in rows]
+            if stale:
+                raise WriteConflict(f"Rows changed by someone else in {sheet_name}: {lost}", lost)
+            raise KeyError(f"Rows no longer present in {sheet_name} (edited elsewhere?): {lost}")
+
+        col_no = {col: i + 1 for i, col in enumerate(header)}
+        if stale:
+            base_values = base_values or {}
+            conflicts = []
+            for key, label in wanted.items():
+                for col in changes[label]:
+                    base = base_values.get(label, {}).get(col, original_df.at[label, col])
+                    current = ws.cell(row=rows[key], column=col_no[col]).value
+                    if _norm_key(current) != _norm_key(base):
+                        conflicts.append((key[:-1], col, current))
+            if conflicts:
+                raise WriteConflict(
+                    f"{len(conflicts)} cell(s) in {sheet_name} were changed by someone else since you loaded them",
+                    conflicts,
+                )
+
+        written = 0
+        for key, label in wanted.items():
+            for col, value in changes[label].items():
+                ws.cell(row=rows[key], column=col_no[col]).value = _cell_value(value)
+                written += 1
+
+        WriteCoordinator.save_workbook(wb, excel_file)
+        Journal.release(claimed)
+    return written
+
+
+# ---- Save time vs sheet size: python SheetWriter.py [rows ...] ----
+
+def _legacy_save(edited_df, excel_file, sheet_name, project):
+    # Previous UpdatingActualsWithFilter handler, kept here only for comparison
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_file)
+    ws = wb[sheet_name]
+    header = [cell.value for cell in ws[1]]
+    project_col_index = header.index("Project Name")
+    rows_to_delete = [
+        i for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2)
+        if str(row[project_col_index]) == project
+    ]
+    for row_idx in reversed(rows_to_delete):
+        ws.delete_rows(row_idx)
+    for row in edited_df.itertuples(index=False):
+        ws.append([_cell_value(v) for v in row])
+    wb.save(excel_file)
+
+
+def benchmark(sizes=(250, 500, 1000, 2000), project="Test"):
+    import SyntheticData
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"bench_{rows}.xlsx")
+            SyntheticData.make_workbook(path, rows=rows)
+            df = pd.read_excel(path, sheet_name="Sheet1")
+            df["AssociateID"] = df["AssociateID"].astype("string")
+            edited = df[df["Project Name"] == project].copy()
+            edited["Jan Actuals"] = edited["Jan Actuals"] + 1
+
+            start = time.perf_counter()
+            _legacy_save(edited, path, "Sheet1", project)
+            legacy_s = time.perf_counter() - start
+
+            SyntheticData.make_workbook(path, rows=rows)
+            start = time.perf_counter()
+            cells = save_changes(df, edited, path, "Sheet1")
+            incremental_s = time.perf_counter() - start
+            yield rows, len(edited), cells, legacy_s, incremental_s
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or (250, 500, 1000, 2000)
+    print(f"{'rows':>7}{'edited':>8}{'cells':>7}{'legacy':>11}{'incremental':>13}")
+    for rows, edited, cells, legacy_s, incremental_s in benchmark(sizes):
+        print(f"{rows:>7}{edited:>8}{cells:>7}{legacy_s:>10.2f}s{incremental_s:>12.2f}s", flush=True)
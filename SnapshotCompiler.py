@@ -0,0 +1,170 @@
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import WriteCoordinator
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow ships with streamlit, but keep the xlsx path working without it
+    pa = None
+    feather = None
+
+# Columnar snapshot of BaseDatasheet.xlsx.
+# Every sheet is compiled once into an uncompressed Feather (Arrow IPC) file that is
+# read back memory-mapped, so worker processes skip openpyxl XML parsing entirely.
+# Files are named by the workbook version (mtime_ns-size-inode) and a manifest points at the
+# current set, so a rebuild only happens when the workbook changes on disk.
+# PRIVATE_SHEETS (the Authenticate sheet's plaintext passwords) are never written out.
+
+SNAPSHOT_DIR = ".snapshot"
+FORMAT_VERSION = 2  # 2: PRIVATE_SHEETS left out; recompiling removes their old files
+PRIVATE_SHEETS = ("Authenticate",)
+
+
+def available():
+    return feather is not None
+
+
+def _version(excel_file):
+    return WriteCoordinator.file_version(excel_file)
+
+
+def _paths(excel_file):
+    folder = os.path.join(os.path.dirname(os.path.abspath(excel_file)), SNAPSHOT_DIR)
+    stem = os.path.splitext(os.path.basename(excel_file))[0]
+    return folder, stem, os.path.join(folder, f"{stem}.manifest.json")
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _arrow_safe(df):
+    # Excel object columns can mix numbers and text; Arrow needs one type per column
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].astype("string")
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def is_fresh(excel_file):
+    _, _, manifest_path = _paths(excel_file)
+    manifest = _read_manifest(manifest_path)
+    return (
+        manifest is not None
+        and manifest.get("format") == FORMAT_VERSION
+        and tuple(manifest.get("source_version", ())) == _version(excel_file)
+        and all(os.path.exists(path) for path in manifest["sheets"].values())
+    )
+
+
+def compile_snapshot(excel_file):
+    """Parse the workbook once and write one Feather file per sheet."""
+    if not available():
+        raise RuntimeError("pyarrow is required to compile a snapshot")
+
+    version = _version(excel_file)
+    folder, stem, manifest_path = _paths(excel_file)
+    os.makedirs(folder, exist_ok=True)
+    tag = "-".join(str(part) for part in version)
+
+    sheets = {}
+    with pd.ExcelFile(excel_file) as workbook:
+        names = [name for name in workbook.sheet_names if name not in PRIVATE_SHEETS]
+        frames = pd.read_excel(workbook, sheet_name=names)
+    for sheet_name, df in frames.items():
+        path = os.path.join(folder, f"{stem}.{sheet_name}.{tag}.feather")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(_arrow_safe(df), tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        sheets[sheet_name] = path
+
+    manifest = {"format": FORMAT_VERSION, "source_version": list(version), "sheets": sheets}
+    tmp_manifest = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_manifest, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp_manifest, manifest_path)
+
+    # Drop snapshots of older workbook versions
+    current = set(sheets.values())
+    for path in glob.glob(os.path.join(folder, f"{stem}.*.feather")):
+        if path not in current:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return manifest
+
+
+def ensure_snapshot(excel_file):
+    if is_fresh(excel_file):
+        return _read_manifest(_paths(excel_file)[2])
+    return compile_snapshot(excel_file)
+
+
+def read_sheet(excel_file, sheet_name):
+    """Memory-mapped read of one sheet, (re)compiling the snapshot if the workbook changed."""
+    if sheet_name in PRIVATE_SHEETS:
+        raise ValueError(f"Worksheet '{sheet_name}' is not compiled into the snapshot")
+    manifest = ensure_snapshot(excel_file)
+    if sheet_name not in manifest["sheets"]:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    table = feather.read_table(manifest["sheets"][sheet_name], memory_map=True)
+    return table.to_pandas()
+
+
+# ---- Load-time comparison: python SnapshotCompiler.py [--scale 100] ----
+
+def _time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(excel_file, sheets=("Sheet1", "Sheet3")):
+    compile_s = _time(lambda: compile_snapshot(excel_file), repeat=1)
+    xlsx_s = _time(lambda: [pd.read_excel(excel_file, sheet_name=s) for s in sheets])
+    snap_s = _time(lambda: [read_sheet(excel_file, s) for s in sheets])
+    return {"compile_s": compile_s, "xlsx_s": xlsx_s, "snapshot_s": snap_s}
+
+
+def main(argv):
+    import SyntheticData
+
+    scale = int(argv[argv.index("--scale") + 1]) if "--scale" in argv else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        workbooks = {"current": SyntheticData.SOURCE_FILE}
+        workbooks[f"{scale}x synthetic"] = SyntheticData.make_workbook(
+            os.path.join(tmp, "BaseDatasheet.xlsx"), scale=scale
+        )
+        print(f"{'workbook':<16}{'rows':>8}{'xlsx':>12}{'snapshot':>12}{'speedup':>10}{'compile':>12}")
+        for label, path in workbooks.items():
+            rows = len(pd.read_excel(path, sheet_name="Sheet1"))
+            res = benchmark(path)
+            print(
+                f"{label:<16}{rows:>8}{res['xlsx_s'] * 1000:>10.1f}ms{res['snapshot_s'] * 1000:>10.1f}ms"
+                f"{res['xlsx_s'] / res['snapshot_s']:>9.0f}x{res['compile_s'] * 1000:>10.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,313 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import Journal
+import SheetWriter
+import SnapshotCompiler
+import WriteCoordinator
+from WriteCoordinator import WriteConflict
+
+# Pluggable storage for the dashboard data.
+# "xlsx" (default) keeps BaseDatasheet.xlsx as the system of record; "mongo" stores each
+# sheet as a MongoDB collection with compound indexes and pushes filters, projections and
+# $group totals down to the server. Pick one with REVENUE_STORAGE=xlsx|mongo.
+#
+# Mongo settings: REVENUE_MONGO_URI (default mongodb://localhost:27017) and
+# REVENUE_MONGO_DB (default "revenue"). A "mongomock://" URI uses the in-memory
+# mongomock client, so the backend can be exercised without a mongod binary.
+# Seed a database from the workbook with: python StorageBackend.py import-xlsx [file]
+
+EXCEL_FILE = "BaseDatasheet.xlsx"
+STORAGE = os.environ.get("REVENUE_STORAGE", "xlsx")
+MONGO_URI = os.environ.get("REVENUE_MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.environ.get("REVENUE_MONGO_DB", "revenue")
+
+_lock = threading.Lock()
+_backends = {}
+
+
+file_version = WriteCoordinator.file_version
+# sheets with secrets: read straight from the source, never snapshotted or cached
+PRIVATE_SHEETS = SnapshotCompiler.PRIVATE_SHEETS
+
+
+class ExcelBackend:
+    name = "xlsx"
+    pushdown = False
+
+    def __init__(self, excel_file=EXCEL_FILE):
+        self.excel_file = excel_file
+        self.key = os.path.abspath(excel_file)
+
+    def version(self):
+        # workbook on disk plus its pending AddingUser journal
+        return (file_version(self.excel_file), Journal.version(self.excel_file))
+
+    def _read(self, sheet_name):
+        # Columnar snapshot when pyarrow is available, plain openpyxl parse otherwise
+        if SnapshotCompiler.available() and sheet_name not in PRIVATE_SHEETS:
+            return SnapshotCompiler.read_sheet(self.excel_file, sheet_name)
+        return pd.read_excel(self.excel_file, sheet_name=sheet_name)
+
+    def _applied_ids(self):
+        # journal entries already saved into the workbook whose claimed file is still around
+        if not Journal.has_claims(self.excel_file):
+            return set()
+        try:
+            return set(self._read(Journal.APPLIED_SHEET)[Journal.APPLIED_COLUMN].dropna())
+        except (ValueError, KeyError):
+            return set()
+
+    def read_sheet(self, sheet_name):
+        df = self._read(sheet_name)
+        pending = Journal.pending_rows(sheet_name, self.excel_file, self._applied_ids())
+        if pending:
+            df = pd.concat([df, pd.DataFrame(pending)], ignore_index=True)
+        return df
+
+    def append_row(self, row, sheet_name="Sheet1"):
+        Journal.append(row, sheet_name=sheet_name, excel_file=self.excel_file)
+        Journal.start_compactor(self.excel_file)
+
+    def append_rows(self, rows, sheet_name="Sheet1"):
+        # one journal line for the batch; folded into the workbook by a single compaction
+        Journal.append_many(rows, sheet_name=sheet_name, excel_file=self.excel_file)
+        Journal.start_compactor(self.excel_file)
+
+    def save_changes(self, original_df, edited_df, sheet_name, base_version=None, base_values=None):
+        # base_version is a version() stamp; only the workbook half matters for cell edits
+        return SheetWriter.save_changes(
+            original_df, edited_df, self.excel_file, sheet_name,
+            expected_version=base_version[0] if base_version else None, base_values=base_values,
+        )
+
+
+def _mongo_client(uri):
+    if uri.startswith("mongomock://"):
+        import mongomock
+        return mongomock.MongoClient()
+    from pymongo import MongoClient
+    return MongoClient(uri)
+
+
+def _mongo_value(value):
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def _column_name(name):
+    # Sheet3 year headers (2020, 2021, ...) are stored as string keys
+    return int(name) if isinstance(name, str) and name.isdigit() else name
+
+
+class MongoBackend:
+    name = "mongo"
+    pushdown = True
+
+    # Sheet1 read paths: project filter, and Home's service line / region breakdowns
+    INDEXES = {
+        "Sheet1": [
+            [("Project Name", 1), ("ServiceLine", 1), ("Region", 1)],
+            [("ServiceLine", 1), ("Region", 1)],
+            [("Region", 1), ("ServiceLine", 1)],
+        ],
+    }
+
+    def __init__(self, uri=MONGO_URI, db_name=MONGO_DB, client=None):
+        self.client = client or _mongo_client(uri)
+        self.db = self.client[db_name]
+        self.meta = self.db["_meta"]
+        self.key = f"mongo:{uri}/{db_name}"
+
+    def ensure_indexes(self, sheet_name):
+        coll = self.db[sheet_name]
+        coll.create_index([("_row", 1)], unique=True)
+        for keys in self.INDEXES.get(sheet_name, []):
+            coll.create_index(keys)
+
+    def _bump_version(self):
+        self.meta.update_one({"_id": "version"}, {"$inc": {"n": 1}}, upsert=True)
+
+    def version(self):
+        doc = self.meta.find_one({"_id": "version"})
+        return ("mongo", doc["n"] if doc else 0)
+
+    def columns(self, sheet_name):
+        doc = self.meta.find_one({"_id": f"header:{sheet_name}"})
+        return [_column_name(col) for col in doc["columns"]] if doc else []
+
+    def find(self, sheet_name, where=None, columns=None):
+        """Rows matching `where` (field -> value or list of values), only `columns` fetched."""
+        query = {}
+        for field, value in (where or {}).items():
+            query[str(field)] = {"$in": list(value)} if isinstance(value, (list, tuple, set)) else value
+        projection = {"_id": 0, "_row": 1}
+        for col in columns or []:
+            projection[str(col)] = 1
+        if not columns:
+            projection = {"_id": 0}
+
+        docs = list(self.db[sheet_name].find(query, projection).sort("_row", 1))
+        header = [col for col in self.columns(sheet_name) if not columns or col in columns]
+        df = pd.DataFrame(docs)
+        if df.empty:
+            return pd.DataFrame(columns=header)
+        df = df.set_index("_row")
+        df.index.name = None
+        df.columns = [_column_name(col) for col in df.columns]
+        return df.reindex(columns=header)
+
+    def read_sheet(self, sheet_name):
+        return self.find(sheet_name)
+
+    def group_totals(self, sheet_name, dimensions, value_columns):
+        """$group pushdown: summed value_columns per combination of dimensions."""
+        group = {"_id": {f"d{i}": f"${dim}" for i, dim in enumerate(dimensions)}}
+        for j, col in enumerate(value_columns):
+            group[f"v{j}"] = {"$sum": f"${col}"}
+        rows = []
+        for doc in self.db[sheet_name].aggregate([{"$group": group}]):
+            row = {dim: doc["_id"].get(f"d{i}") for i, dim in enumerate(dimensions)}
+            row.update({col: doc[f"v{j}"] for j, col in enumerate(value_columns)})
+            rows.append(row)
+        return pd.DataFrame(rows, columns=list(dimensions) + list(value_columns))
+
+    def _next_rows(self, sheet_name, count):
+        doc = self.meta.find_one_and_update(
+            {"_id": f"rows:{sheet_name}"}, {"$inc": {"next": count}}, upsert=True, return_document=True
+        )
+        return range(doc["next"] - count, doc["next"])
+
+    def _add_header_columns(self, sheet_name, columns):
+        self.meta.update_one(
+            {"_id": f"header:{sheet_name}"},
+            {"$push": {"columns": {"$each": [str(c) for c in columns if c not in self.columns(sheet_name)]}}},
+            upsert=True,
+        )
+
+    def append_row(self, row, sheet_name="Sheet1"):
+        (row_no,) = self._next_rows(sheet_name, 1)
+        doc = {str(k): _mongo_value(v) for k, v in row.items() if _mongo_value(v) is not None}
+        doc["_row"] = row_no
+        self._add_header_columns(sheet_name, row.keys())
+        self.db[sheet_name].insert_one(doc)
+        self._bump_version()
+
+    def append_rows(self, rows, sheet_name="Sheet1"):
+        """One insert_many for the batch, with consecutive row ordinals."""
+        rows = list(rows)
+        if not rows:
+            return
+        docs = []
+        columns = []
+        for row_no, row in zip(self._next_rows(sheet_name, len(rows)), rows):
+            doc = {str(k): _mongo_value(v) for k, v in row.items() if _mongo_value(v) is not None}
+            doc["_row"] = row_no
+            docs.append(doc)
+            columns.extend(col for col in row if col not in columns)
+        self._add_header_columns(sheet_name, columns)
+        self.db[sheet_name].insert_many(docs)
+        self._bump_version()
+
+    def _bulk_update(self, sheet_name, updates):
+        coll = self.db[sheet_name]
+        if type(self.client).__module__.startswith("mongomock"):
+            # mongomock's bulk API lags pymongo 4.x; apply the same updates one by one
+            return sum(coll.update_one(query, update).matched_count for query, update in updates)
+        from pymongo import UpdateOne
+        ops = [UpdateOne(query, update) for query, update in updates]
+        return coll.bulk_write(ops, ordered=False).matched_count
+
+    def save_changes(self, original_df, edited_df, sheet_name, base_version=None, base_values=None):
+        """One bulk_write of $set/$unset per changed row, addressed by its row ordinal.
+
+        With base_values, each update only matches while the row still holds the values
+        the editor started from (a compare-and-set per row), so stale edits conflict.
+        """
+        changes = SheetWriter.diff_rows(original_df, edited_df)
+        if not changes:
+            return 0
+        updates = []
+        written = 0
+        for label, cols in changes.items():
+            query = {"_row": int(label)}
+            if base_values is not None:
+                for col in cols:
+                    query[str(col)] = _mongo_value(base_values.get(label, {}).get(col, original_df.at[label, col]))
+            update = {}
+            for col, value in cols.items():
+                value = _mongo_value(value)
+                if value is None:
+                    update.setdefault("$unset", {})[str(col)] = ""
+                else:
+                    update.setdefault("$set", {})[str(col)] = value
+                written += 1
+            updates.append((query, update))
+        matched = self._bulk_update(sheet_name, updates)
+        if matched != len(updates):
+            self._bump_version()
+            missed = len(updates) - matched
+            if base_values is not None:
+                raise WriteConflict(f"{missed} edited row(s) in {sheet_name} were changed by someone else", [])
+            raise KeyError(f"{missed} edited row(s) no longer present in {sheet_name}")
+        self._bump_version()
+        return written
+
+    def import_workbook(self, excel_file=EXCEL_FILE):
+        """Replace the collections with every sheet of the workbook."""
+        for sheet_name, df in pd.read_excel(excel_file, sheet_name=None).items():
+            coll = self.db[sheet_name]
+            coll.drop()
+            docs = []
+            for row_no, record in enumerate(df.to_dict("records")):
+                doc = {str(k): _mongo_value(v) for k, v in record.items() if _mongo_value(v) is not None}
+                doc["_row"] = row_no
+                docs.append(doc)
+            if docs:
+                coll.insert_many(docs)
+            self.meta.replace_one(
+                {"_id": f"header:{sheet_name}"}, {"columns": [str(c) for c in df.columns]}, upsert=True
+            )
+            self.meta.replace_one({"_id": f"rows:{sheet_name}"}, {"next": len(docs)}, upsert=True)
+            self.ensure_indexes(sheet_name)
+        self._bump_version()
+
+
+def get_backend(excel_file=None):
+    """The configured backend, or an ExcelBackend for an explicit workbook path."""
+    key = ("xlsx", os.path.abspath(excel_file)) if excel_file else ("default", STORAGE)
+    with _lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if excel_file or STORAGE == "xlsx":
+                backend = ExcelBackend(excel_file or EXCEL_FILE)
+            elif STORAGE == "mongo":
+                backend = MongoBackend()
+            else:
+                raise ValueError(f"Unknown REVENUE_STORAGE '{STORAGE}' (expected 'xlsx' or 'mongo')")
+            _backends[key] = backend
+        return backend
+
+
+def configure(backend):
+    """Use `backend` as the default (e.g. a MongoBackend built on a mongomock client)."""
+    with _lock:
+        _backends[("default", STORAGE)] = backend
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["import-xlsx"]:
+        source = sys.argv[2] if len(sys.argv) > 2 else EXCEL_FILE
+        MongoBackend().import_workbook(source)
+        print(f"Imported {source} into {MONGO_URI}/{MONGO_DB}")
+    else:
+        print("usage: python StorageBackend.py import-xlsx [BaseDatasheet.xlsx]")
@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Synthetic BaseDatasheet.xlsx generator for benchmarks.
+# Rows are sampled from the real Sheet1 so the schema (columns, dtypes, value ranges)
+# matches what the pages expect; AssociateIDs are made unique per row.
+
+SOURCE_FILE = "BaseDatasheet.xlsx"
+
+
+def make_sheet1(rows, source_file=SOURCE_FILE, seed=0):
+    base = pd.read_excel(source_file, sheet_name="Sheet1")
+    base = base.dropna(subset=["Project Name"]).reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), size=rows)].reset_index(drop=True)
+    df["AssociateID"] = [f"AID{i:07d}" for i in range(1, rows + 1)]
+
+    # Jitter the month measures so aggregates aren't trivially repeated
+    month_cols = [col for col in df.columns if "Actuals" in col or "Forecast" in col]
+    jitter = rng.uniform(0.8, 1.2, size=(rows, len(month_cols)))
+    df[month_cols] = (df[month_cols] * jitter).round(0)
+    return df
+
+
+def make_workbook(path, rows=None, scale=None, source_file=SOURCE_FILE, seed=0):
+    """Write a workbook with the real sheets but a Sheet1 of `rows` (or `scale` x current) rows."""
+    sheets = pd.read_excel(source_file, sheet_name=None)
+    if rows is None:
+        rows = len(sheets["Sheet1"]) * (scale or 1)
+    sheets["Sheet1"] = make_sheet1(rows, source_file=source_file, seed=seed)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return path
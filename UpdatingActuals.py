@@ -1,32 +1,34 @@
 import streamlit as st
 import pandas as pd
-from openpyxl import load_workbook
 import os
 
+import DataStore
+import PagedEditor
+import StorageBackend
+from WriteCoordinator import WriteConflict
+
 # Load Excel data into a DataFrame
-excel_file = "BaseDatasheet.xlsx"
 sheet_name = "Sheet1"
 
-# Read the Excel file
-df = pd.read_excel(excel_file, sheet_name=sheet_name)
+# Read the Excel file (shared cache)
+df = DataStore.load_sheet(sheet_name)
 
 st.title("Updating Actuals / Forecast")
 
-# Show editable table
-edited_df = st.data_editor(df, num_rows="fixed", use_container_width=True)
+# Show editable table, one page at a time (edits are buffered across pages)
+PagedEditor.paged_data_editor(df, key="updating_actuals")
 
 # Save changes back to Excel
 if st.button("Save Changes"):
-    # Load workbook and overwrite the sheet with edited data
-    wb = load_workbook(excel_file)
-    ws = wb[sheet_name]
-
-    # Clear existing data
-    ws.delete_rows(2, ws.max_row)
-
-    # Write updated rows
-    for r_idx, row in edited_df.iterrows():
-        ws.append(row.tolist())
-
-    wb.save(excel_file)
-    st.success("Changes saved to Excel!")
+    # Write only the buffered changes instead of rewriting every row
+    edited_df = PagedEditor.changed_rows(df, "updating_actuals")
+    try:
+        StorageBackend.get_backend().save_changes(
+            df, edited_df, sheet_name,
+            base_version=PagedEditor.base_version("updating_actuals"),
+            base_values=PagedEditor.base_values("updating_actuals"),
+        )
+        PagedEditor.clear("updating_actuals")
+        st.success("Changes saved to Excel!")
+    except WriteConflict as e:
+        st.error(f"Not saved: {e}. Reload the page to see the latest data.")
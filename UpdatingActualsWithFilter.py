@@ -1,51 +1,66 @@
 import streamlit as st
 import pandas as pd
-from openpyxl import load_workbook
-import os
+
+import DataStore
+import PagedEditor
+import Profiler
+import StorageBackend
+from WriteCoordinator import WriteConflict
 
 def show_page():
     # Load Excel data
-    excel_file = "BaseDatasheet.xlsx"
     sheet_name = "Sheet1"
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
+    df = DataStore.load_sheet(sheet_name)
+    project_index = DataStore.project_index(sheet_name)
 
     st.title("🧠 Update Actuals / Forecast Data")
 
-    # 🔍 Filter by Project Name with exact match
-    project_filter = st.text_input("Filter by Project Name (Exact Match)", placeholder="Type exact project name")
-
-    # Convert AssociateID to string to avoid comma formatting
-    df["AssociateID"] = df["AssociateID"].astype(str)
+    # 🔍 Filter by Project Name: exact, prefix or typo-tolerant match
+    match_mode = st.radio("Match", ["Exact", "Prefix", "Fuzzy"], horizontal=True)
+    project_filter = st.text_input("Filter by Project Name", placeholder="Type a project name")
+    with Profiler.stage("filter"):
+        matched_projects = project_index.search(project_filter, match_mode)
+        # Only the indexed rows of the matched projects
+        filtered_df = df.iloc[project_index.rows(matched_projects)] if project_filter else df.copy()
+    if project_filter and match_mode != "Exact":
+        st.caption(f"Matching projects: {', '.join(map(str, matched_projects)) or 'none'}")
 
-    # Apply exact match filter
-    filtered_df = df[df["Project Name"] == project_filter] if project_filter else df.copy()
-
-    # Show editable table
-    edited_df = st.data_editor(filtered_df, num_rows="fixed", use_container_width=True)
+    # Show editable table, one page at a time; edits are buffered across pages
+    PagedEditor.paged_data_editor(filtered_df, key="update_actuals")
+    pending = PagedEditor.pending_count("update_actuals")
+    st.caption(f"✏️ {pending} unsaved cell change(s)")
 
     # Save changes
-    if st.button("💾 Save Changes"):
+    save_col, discard_col = st.columns([1, 5])
+    if discard_col.button("↩️ Discard Changes", disabled=not pending):
+        PagedEditor.clear("update_actuals")
+        st.rerun()
+    if save_col.button("💾 Save Changes"):
         try:
-            wb = load_workbook(excel_file)
-            ws = wb[sheet_name]
-
-            # Get header from original sheet
-            header = [cell.value for cell in ws[1]]
-            project_col_index = header.index("Project Name")
-
-            # Remove rows matching the exact project name
-            rows_to_delete = [
-                i for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2)
-                if str(row[project_col_index]) == project_filter
-            ]
-            for row_idx in reversed(rows_to_delete):
-                ws.delete_rows(row_idx)
-
-            # Append updated rows
-            for row in edited_df.itertuples(index=False):
-                ws.append(list(row))
-
-            wb.save(excel_file)
-            st.success(f"✅ Changes saved for project: {project_filter}")
+            # Commit only the change buffer (in place in the workbook, or one Mongo bulk_write)
+            edited_df = PagedEditor.changed_rows(df, "update_actuals")
+            base_version = PagedEditor.base_version("update_actuals")
+            # the in-place index update is only valid if nobody else saved in between
+            index_current = base_version == DataStore.data_version()
+            written = StorageBackend.get_backend().save_changes(
+                df, edited_df, sheet_name,
+                base_version=base_version, base_values=PagedEditor.base_values("update_actuals"),
+            )
+            PagedEditor.clear("update_actuals")
+            if written:
+                if index_current:
+                    project_index.apply_edits(df, edited_df)
+                    DataStore.publish(f"project_index:{sheet_name}", project_index)
+                st.success(f"✅ Saved {written} changed cell(s) for project: {project_filter or 'All Projects'}")
+            else:
+                st.info("No changes to save.")
+        except WriteConflict as e:
+            st.error(f"⚠️ {e}. Discard your changes to reload the latest data, then edit again.")
+            if e.cells:
+                st.dataframe(
+                    pd.DataFrame([(*key, col, value) for key, col, value in e.cells],
+                                 columns=["AssociateID", "Project Name", "Column", "Current Value"]),
+                    use_container_width=True
+                )
         except Exception as e:
             st.error(f"❌ Failed to save changes: {e}")
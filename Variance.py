@@ -0,0 +1,173 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import DataStore
+import FactTable
+import RevenueCube
+
+# Forecast accuracy for every project and month at once.
+# The revenue cube (Sheet1 summed per ServiceLine / Region / Project / Month / Metric, one
+# pass per data version) is unstacked into two (row x 12 month) matrices, Actuals and
+# Forecast, one row per (ServiceLine, Region, Project Name). Per-cell variance and
+# absolute percentage error are computed once for the whole matrix; a month selection is
+# then masked sums over those cells, and the top-N view a filter plus one argsort.
+#
+#   Variance      Actuals - Forecast (positive: actuals beat the forecast)
+#   Abs Variance  sum of |Actuals - Forecast| per month, so misses don't cancel out
+#   MAPE %        mean of |Actuals - Forecast| / |Actuals| over months with non-zero actuals
+#   Bias %        Variance / Forecast (positive: under-forecast, negative: over-forecast)
+#
+# Only months with both an Actuals and a Forecast value are compared. Rows without a
+# project name are left out, as in RevenueCube.totals_by.
+# One build, timed: python Variance.py [workbook]
+
+MONTHS = FactTable.MONTHS
+KEYS = ["ServiceLine", "Region", "Project Name"]
+COLUMNS = ["Actuals", "Forecast", "Variance", "Abs Variance", "MAPE %", "Bias %", "Months"]
+# rankings offered for the top-N view; signed columns rank by magnitude
+RANK_BY = ["MAPE %", "Abs Variance", "Bias %", "Variance"]
+_SIGNED = {"Bias %", "Variance"}
+
+
+def _pct(delta, base):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base != 0, delta / np.abs(base) * 100, np.nan)
+
+
+def _month_positions(months):
+    if months is None:
+        return np.arange(len(MONTHS))
+    return np.array([MONTHS.index(FactTable.canonical_month(month)) for month in months], dtype=np.intp)
+
+
+class VarianceTable:
+    """Actual-vs-forecast cells and per-row accuracy for every project; never mutated."""
+
+    def __init__(self, keys, actuals, forecast):
+        self.keys = keys  # DataFrame of KEYS, one row per matrix row
+        self.actuals = actuals
+        self.forecast = forecast
+        self.compared = ~np.isnan(actuals) & ~np.isnan(forecast)
+        self.variance = np.where(self.compared, actuals - forecast, np.nan)
+        self.ape = np.where(self.compared, _pct(np.abs(self.variance), actuals), np.nan)
+        self._overall = None
+
+    @classmethod
+    def build(cls, cube):
+        cube = cube.dropna(subset=["Project Name"])
+        # every cube cell scattered straight into its (row, month) slot of the metric's matrix
+        row, keys = pd.factorize(pd.MultiIndex.from_frame(cube[KEYS]), sort=True)
+        month = cube["Month"].cat.codes.to_numpy()
+        values = cube["Value"].to_numpy(dtype="float64")
+
+        def matrix(metric):
+            picked = (cube["Metric"] == metric).to_numpy()
+            cells = (row[picked], month[picked])
+            totals = np.zeros((len(keys), len(MONTHS)))
+            np.add.at(totals, cells, values[picked])
+            present = np.zeros(totals.shape, dtype=bool)
+            present[cells] = True
+            totals[~present] = np.nan
+            return totals
+
+        return cls(keys.to_frame(index=False, name=KEYS), matrix("Actuals"), matrix("Forecast"))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def months(self):
+        """Months with at least one compared Actuals/Forecast pair, in calendar order."""
+        return [MONTHS[col] for col in np.flatnonzero(self.compared.any(axis=0))]
+
+    def _accuracy(self, months):
+        # {column: one value per row} over the given months (all when None), cached for None
+        if months is None and self._overall is not None:
+            return self._overall
+        cols = _month_positions(months)
+        compared = self.compared[:, cols]
+        actuals = np.where(compared, self.actuals[:, cols], 0.0).sum(axis=1)
+        forecast = np.where(compared, self.forecast[:, cols], 0.0).sum(axis=1)
+        variance = actuals - forecast
+        ape = self.ape[:, cols]
+        counted = (~np.isnan(ape)).sum(axis=1)
+        with np.errstate(invalid="ignore"):
+            mape = np.where(counted > 0, np.nansum(ape, axis=1) / counted, np.nan)
+        accuracy = {
+            "Actuals": actuals, "Forecast": forecast, "Variance": variance,
+            "Abs Variance": np.nansum(np.abs(self.variance[:, cols]), axis=1),
+            "MAPE %": mape, "Bias %": _pct(variance, forecast), "Months": compared.sum(axis=1),
+        }
+        if months is None:
+            self._overall = accuracy
+        return accuracy
+
+    def _frame(self, accuracy, rows):
+        frame = {key: self.keys[key].to_numpy()[rows] for key in KEYS}
+        frame.update((name, accuracy[name][rows]) for name in COLUMNS)
+        return pd.DataFrame(frame)
+
+    def summary(self, months=None):
+        """One row per project: KEYS and COLUMNS over the given months (all when None)."""
+        return self._frame(self._accuracy(months), np.arange(len(self.keys)))
+
+    def top(self, n=10, by="MAPE %", months=None, service_lines=None, regions=None, worst_first=True):
+        """The n worst (or best) forecast projects by `by`, after the ServiceLine / Region filters."""
+        accuracy = self._accuracy(months)
+        keep = accuracy["Months"] > 0
+        if service_lines:
+            keep &= self.keys["ServiceLine"].isin(service_lines).to_numpy()
+        if regions:
+            keep &= self.keys["Region"].isin(regions).to_numpy()
+        rows = np.flatnonzero(keep)
+        score = accuracy[by][rows]
+        if by in _SIGNED:
+            score = np.abs(score)
+        if worst_first:
+            score = -score
+        # NaN scores (no non-zero actuals for MAPE) always sort last
+        order = np.argsort(np.where(np.isnan(score), np.inf, score), kind="stable")
+        return self._frame(accuracy, rows[order[:n]])
+
+    def detail(self, projects, months=None):
+        """Long frame: Project Name, Month, Actuals, Forecast, Variance and APE % per compared cell."""
+        rows = np.flatnonzero(self.keys["Project Name"].isin(projects).to_numpy())
+        cols = _month_positions(months)
+        grid = np.ix_(rows, cols)
+        frame = pd.DataFrame({
+            "Project Name": np.repeat(self.keys["Project Name"].to_numpy()[rows], len(cols)),
+            "Month": pd.Categorical.from_codes(np.tile(cols, len(rows)), dtype=FactTable.MONTH_DTYPE),
+            "Actuals": self.actuals[grid].ravel(), "Forecast": self.forecast[grid].ravel(),
+            "Variance": self.variance[grid].ravel(), "APE %": self.ape[grid].ravel(),
+        })
+        return frame[self.compared[grid].ravel()].reset_index(drop=True)
+
+
+def build_variance(cube):
+    return VarianceTable.build(cube)
+
+
+def get_variance(excel_file=None):
+    """VarianceTable for the current data version (published by the RefreshWorker, built inline otherwise)."""
+    return DataStore.derived(
+        "variance", lambda: build_variance(RevenueCube.get_cube(excel_file, stale_ok=False)), excel_file, stale_ok=True
+    )
+
+
+def main(argv):
+    excel_file = argv[0] if argv else None
+    cube = RevenueCube.build_revenue_cube(excel_file)
+    start = time.perf_counter()
+    table = build_variance(cube)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    worst = table.top(5)
+    ranked = time.perf_counter() - start
+    print(f"{len(table)} projects x {len(table.months())} months: build {built * 1000:.2f} ms, top 5 {ranked * 1000:.2f} ms")
+    print(worst.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,200 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Coordinated writes to BaseDatasheet.xlsx.
+# Every load-modify-save cycle (SheetWriter saves, journal compaction) runs under one
+# exclusive lock per workbook: a thread lock inside this process plus an OS file lock
+# on "<workbook>.lock" against other processes (other Streamlit servers, CLI compactions).
+# Saves go to a temp file in the same folder and are renamed over the workbook, so a
+# crash mid-save leaves the previous file intact.
+#
+# Stress run (parallel writers, no lost updates): python WriteCoordinator.py [writers] [rounds]
+
+LOCK_TIMEOUT_S = 30
+POLL_INTERVAL_S = 0.05
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd):
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class WriteConflict(Exception):
+    """The cells being saved were changed by someone else since the editor loaded them."""
+
+    def __init__(self, message, cells=()):
+        super().__init__(message)
+        self.cells = list(cells)
+
+
+def file_version(excel_file):
+    """Version stamp of the workbook on disk: (mtime_ns, size, inode).
+
+    mtime alone is only as fine as the filesystem clock tick; every save_workbook
+    replaces the file, so the inode changes even when two saves share a tick.
+    """
+    stat = os.stat(excel_file)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+_registry_lock = threading.Lock()
+_thread_locks = {}
+_held = {}
+
+
+def _thread_lock(path):
+    with _registry_lock:
+        return _thread_locks.setdefault(path, threading.RLock())
+
+
+@contextmanager
+def workbook_lock(excel_file, timeout=LOCK_TIMEOUT_S):
+    """Exclusive, re-entrant write lock on a workbook across threads and processes."""
+    path = os.path.abspath(excel_file)
+    rlock = _thread_lock(path)
+    if not rlock.acquire(timeout=timeout):
+        raise TimeoutError(f"Timed out waiting for the write lock on {excel_file}")
+    try:
+        if path in _held:
+            # re-entered by the thread that already holds the OS lock
+            _held[path][1] += 1
+        else:
+            fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+            deadline = time.monotonic() + timeout
+            while not _try_lock(fd):
+                if time.monotonic() > deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for the write lock on {excel_file}")
+                time.sleep(POLL_INTERVAL_S)
+            _held[path] = [fd, 1]
+        try:
+            yield
+        finally:
+            _held[path][1] -= 1
+            if not _held[path][1]:
+                fd, _ = _held.pop(path)
+                _unlock(fd)
+                os.close(fd)
+    finally:
+        rlock.release()
+
+
+def save_workbook(wb, excel_file):
+    """wb.save to a temp file next to the workbook, then atomically rename it into place."""
+    path = os.path.abspath(excel_file)
+    fd, tmp_path = tempfile.mkstemp(prefix=".~", suffix=".xlsx", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        wb.save(tmp_path)
+        with open(tmp_path, "rb+") as fh:
+            os.fsync(fh.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+# ---- Stress run: python WriteCoordinator.py [writers] [rounds] ----
+
+def _stress_writer(args):
+    excel_file, writer, rounds, counter_row = args
+    import DataStore
+    import SheetWriter
+
+    conflicts = 0
+    for round_no in range(rounds):
+        while True:
+            # Each writer sets its own row and bumps one shared counter cell; the counter
+            # is a read-modify-write, so overlapping saves must conflict and retry.
+            DataStore.clear_cache()
+            df = DataStore.load_sheet("Sheet1", excel_file)
+            base_version = df.attrs["data_version"][0]
+            edited = df.iloc[[writer, counter_row]].copy()
+            edited.iloc[0, edited.columns.get_loc("Jan Actuals")] = round_no + 1
+            edited.iloc[1, edited.columns.get_loc("Feb Actuals")] = df["Feb Actuals"].fillna(0).iloc[counter_row] + 1
+            try:
+                SheetWriter.save_changes(
+                    df, edited, excel_file, "Sheet1",
+                    expected_version=base_version, base_values=SheetWriter.cell_values(df, edited),
+                )
+                break
+            except WriteConflict:
+                conflicts += 1
+    return conflicts
+
+
+def stress(excel_file, writers=8, rounds=5):
+    """Parallel processes saving the same workbook; checks that no update was lost."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    import pandas as pd
+
+    counter_row = writers
+    before = pd.read_excel(excel_file, sheet_name="Sheet1")
+    counter_start = before["Feb Actuals"].fillna(0).iloc[counter_row]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=writers) as pool:
+        jobs = [(excel_file, w, rounds, counter_row) for w in range(writers)]
+        conflicts = sum(pool.map(_stress_writer, jobs))
+    elapsed = time.perf_counter() - start
+
+    after = pd.read_excel(excel_file, sheet_name="Sheet1")
+    lost = [w for w in range(writers) if after["Jan Actuals"].iloc[w] != rounds]
+    counter = after["Feb Actuals"].iloc[counter_row] - counter_start
+    if counter != writers * rounds:
+        lost.append(f"counter {counter:g}/{writers * rounds}")
+    return {"writers": writers, "rounds": rounds, "seconds": elapsed, "conflicts": conflicts, "lost": lost}
+
+
+def main(argv):
+    import SyntheticData
+    import WriteCoordinator  # not __main__, so workers raise the same WriteConflict class SheetWriter does
+
+    writers = int(argv[0]) if argv else 8
+    rounds = int(argv[1]) if len(argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        excel_file = SyntheticData.make_workbook(os.path.join(tmp, "BaseDatasheet.xlsx"), rows=max(writers + 1, 50))
+        result = WriteCoordinator.stress(excel_file, writers, rounds)
+    status = "OK" if not result["lost"] else f"LOST UPDATES for writers {result['lost']}"
+    print(
+        f"{result['writers']} writers x {result['rounds']} saves in {result['seconds']:.1f}s, "
+        f"{result['conflicts']} conflict retries: {status}"
+    )
+    if result["lost"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("mongomock")
+
+import SheetWriter
+import StorageBackend
+import SyntheticData
+from WriteCoordinator import WriteConflict
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return SyntheticData.make_workbook(str(tmp_path / "BaseDatasheet.xlsx"), rows=40)
+
+
+@pytest.fixture
+def backend(workbook, tmp_path):
+    # a database per test: mongomock clients share one in-memory server
+    backend = StorageBackend.MongoBackend("mongomock://", f"revenue_{tmp_path.name}")
+    backend.import_workbook(workbook)
+    return backend
+
+
+def test_read_sheet_matches_workbook(backend, workbook):
+    expected = pd.read_excel(workbook, sheet_name="Sheet1")
+    sheet = backend.read_sheet("Sheet1")
+    assert list(sheet.columns) == [str(col) for col in expected.columns]
+    assert len(sheet) == len(expected)
+    assert np.isclose(sheet["Jan Actuals"].sum(), expected["Jan Actuals"].sum())
+
+
+def test_find_filters_and_projects(backend, workbook):
+    expected = pd.read_excel(workbook, sheet_name="Sheet1")
+    project = expected["Project Name"].dropna().iloc[0]
+    rows = backend.find("Sheet1", {"Project Name": [project]}, ["AssociateID", "Jan Actuals"])
+    assert list(rows.columns) == ["AssociateID", "Jan Actuals"]
+    assert len(rows) == (expected["Project Name"] == project).sum()
+
+
+def test_group_totals_match_pandas(backend, workbook):
+    expected = pd.read_excel(workbook, sheet_name="Sheet1").groupby("ServiceLine")["Jan Actuals"].sum()
+    totals = backend.group_totals("Sheet1", ["ServiceLine"], ["Jan Actuals"]).set_index("ServiceLine")["Jan Actuals"]
+    assert np.allclose(totals.reindex(expected.index), expected)
+
+
+def test_save_changes_and_stale_conflict(backend):
+    df = backend.read_sheet("Sheet1")
+    version = backend.version()
+    edited = df.iloc[[0]].copy()
+    edited.iloc[0, edited.columns.get_loc("Jan Actuals")] = 111
+    assert backend.save_changes(df, edited, "Sheet1", base_values=SheetWriter.cell_values(df, edited)) == 1
+    assert backend.version() != version
+    assert backend.read_sheet("Sheet1")["Jan Actuals"].iloc[0] == 111
+
+    # the same cell saved again from the rows read before that save
+    stale = df.iloc[[0]].copy()
+    stale.iloc[0, stale.columns.get_loc("Jan Actuals")] = 222
+    with pytest.raises(WriteConflict):
+        backend.save_changes(df, stale, "Sheet1", base_values=SheetWriter.cell_values(df, stale))
+    assert backend.read_sheet("Sheet1")["Jan Actuals"].iloc[0] == 111
+
+
+def test_append_row(backend):
+    before = len(backend.read_sheet("Sheet1"))
+    backend.append_row({"AssociateID": "T1", "Project Name": "Appended", "Region": "EU"})
+    sheet = backend.read_sheet("Sheet1")
+    assert len(sheet) == before + 1
+    assert sheet.iloc[-1]["Project Name"] == "Appended"
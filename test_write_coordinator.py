@@ -0,0 +1,42 @@
+import pytest
+
+import DataStore
+import SheetWriter
+import SyntheticData
+import WriteCoordinator
+from WriteCoordinator import WriteConflict
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = SyntheticData.make_workbook(str(tmp_path / "BaseDatasheet.xlsx"), rows=50)
+    yield path
+    DataStore.clear_cache()
+
+
+def test_parallel_saves_lose_no_updates(workbook):
+    result = WriteCoordinator.stress(workbook, writers=8, rounds=5)
+    assert result["lost"] == []
+
+
+def test_stale_save_conflicts(workbook):
+    DataStore.clear_cache()
+    df = DataStore.load_sheet("Sheet1", workbook)
+    version = df.attrs["data_version"][0]
+
+    first = df.iloc[[0]].copy()
+    first.iloc[0, first.columns.get_loc("Jan Actuals")] = 111
+    SheetWriter.save_changes(
+        df, first, workbook, "Sheet1", expected_version=version, base_values=SheetWriter.cell_values(df, first)
+    )
+
+    # a second editor still working from the rows loaded before that save
+    stale = df.iloc[[0]].copy()
+    stale.iloc[0, stale.columns.get_loc("Jan Actuals")] = 222
+    with pytest.raises(WriteConflict):
+        SheetWriter.save_changes(
+            df, stale, workbook, "Sheet1", expected_version=version, base_values=SheetWriter.cell_values(df, stale)
+        )
+
+    DataStore.clear_cache()
+    assert DataStore.load_sheet("Sheet1", workbook)["Jan Actuals"].iloc[0] == 111